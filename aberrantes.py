@@ -0,0 +1,109 @@
+import warnings
+
+import numpy as np
+import pandas as pd
+
+from colonnes import est_numerique
+
+# Méthode proposée -> seuil par défaut
+METHODES_ABERRANTES = {
+    "IQR": 1.5,
+    "z-score": 3.0,
+    "MAD": 3.5,
+}
+
+# Au-delà de ce nombre de lignes, le mode approché estime les quantiles sur un échantillon
+TAILLE_ECHANTILLON_QUANTILES = 200_000
+
+
+# Fonction pour extraire les colonnes numériques sous forme de matrice de flottants
+def matrice_numerique(data, colonnes=None):
+    if colonnes is None:
+        colonnes = [c for c, t in data.dtypes.items() if est_numerique(t)]
+    colonnes = list(colonnes)
+    if not colonnes:
+        return np.empty((len(data), 0)), colonnes
+    return data[colonnes].to_numpy(dtype=float, na_value=np.nan), colonnes
+
+
+# Quantiles de chaque colonne, éventuellement estimés sur un échantillon de lignes
+def _quantiles(valeurs, probabilites, approximatif):
+    if approximatif and len(valeurs) > TAILLE_ECHANTILLON_QUANTILES:
+        lignes = np.random.default_rng(0).choice(len(valeurs), TAILLE_ECHANTILLON_QUANTILES, replace=False)
+        valeurs = valeurs[lignes]
+    return np.nanquantile(valeurs, probabilites, axis=0)
+
+
+# Bornes basse et haute de chaque colonne (une valeur par colonne)
+def _bornes(valeurs, methode, seuil, approximatif):
+    if methode == "IQR":
+        q1, q3 = _quantiles(valeurs, [0.25, 0.75], approximatif)
+        ecart = q3 - q1
+        return q1 - seuil * ecart, q3 + seuil * ecart
+    if methode == "z-score":
+        moyenne = np.nanmean(valeurs, axis=0)
+        ecart_type = np.nanstd(valeurs, axis=0, ddof=1)
+        return moyenne - seuil * ecart_type, moyenne + seuil * ecart_type
+    if methode == "MAD":
+        mediane = _quantiles(valeurs, 0.5, approximatif)
+        mad = _quantiles(np.abs(valeurs - mediane), 0.5, approximatif)
+        # Score z modifié d'Iglewicz et Hoaglin : 0.6745 * |x - médiane| / MAD
+        return mediane - seuil * mad / 0.6745, mediane + seuil * mad / 0.6745
+    raise ValueError("Méthode de détection non prise en charge.")
+
+
+# Bornes calculées séparément pour chaque groupe, puis étendues à chaque ligne : un seul groupby
+# pour tous les groupes et toutes les colonnes. Les agrégats par groupe sont exacts, le mode approché
+# ne concerne que les bornes sans groupe
+def _bornes_par_groupe(valeurs, codes, methode, seuil):
+    groupes = pd.DataFrame(valeurs).groupby(codes, sort=False)
+    if methode == "IQR":
+        q1 = groupes.transform("quantile", 0.25).to_numpy()
+        q3 = groupes.transform("quantile", 0.75).to_numpy()
+        basses, hautes = q1 - seuil * (q3 - q1), q3 + seuil * (q3 - q1)
+    elif methode == "z-score":
+        moyenne = groupes.transform("mean").to_numpy()
+        ecart_type = groupes.transform("std").to_numpy()
+        basses, hautes = moyenne - seuil * ecart_type, moyenne + seuil * ecart_type
+    elif methode == "MAD":
+        mediane = groupes.transform("median").to_numpy()
+        mad = pd.DataFrame(np.abs(valeurs - mediane)).groupby(codes, sort=False).transform("median").to_numpy()
+        basses, hautes = mediane - seuil * mad / 0.6745, mediane + seuil * mad / 0.6745
+    else:
+        raise ValueError("Méthode de détection non prise en charge.")
+    # Clé de groupe manquante (code -1) : pas de bornes, donc aucune valeur signalée
+    basses[codes < 0] = np.nan
+    hautes[codes < 0] = np.nan
+    return basses, hautes
+
+
+# Fonction pour repérer les lignes contenant au moins une valeur aberrante ; rend leurs positions
+def detecter_aberrantes(data, methode="IQR", seuil=None, colonnes=None, groupe=None, approximatif=False):
+    if seuil is None:
+        seuil = METHODES_ABERRANTES[methode]
+    valeurs, colonnes = matrice_numerique(data, colonnes)
+    if groupe is not None:
+        colonnes_groupe = [c for c in colonnes if c != groupe]
+        valeurs = valeurs[:, [colonnes.index(c) for c in colonnes_groupe]]
+    if valeurs.shape[1] == 0 or len(valeurs) == 0:
+        return np.empty(0, dtype=np.int64)
+    with np.errstate(invalid="ignore"), warnings.catch_warnings():
+        # Colonnes ou groupes entièrement manquants : leurs bornes valent NaN
+        warnings.simplefilter("ignore", RuntimeWarning)
+        if groupe is None:
+            basses, hautes = _bornes(valeurs, methode, seuil, approximatif)
+        else:
+            codes, _ = pd.factorize(data[groupe])
+            basses, hautes = _bornes_par_groupe(valeurs, codes, methode, seuil)
+        # Les comparaisons avec NaN sont fausses : les valeurs manquantes ne sont jamais signalées
+        masque = ((valeurs < basses) | (valeurs > hautes)).any(axis=1)
+    return np.flatnonzero(masque)
+
+
+# Fonction pour retirer les lignes repérées, à partir de leurs positions
+def retirer_lignes(data, positions):
+    if len(positions) == 0:
+        return data
+    garder = np.ones(len(data), dtype=bool)
+    garder[positions] = False
+    return data[garder]
@@ -0,0 +1,178 @@
+import argparse
+import io
+import json
+import os
+import sys
+import tempfile
+
+import numpy as np
+import pandas as pd
+
+from aberrantes import detecter_aberrantes
+from chargement import charger_contenu
+from colonnes import est_numerique
+from conversion import convertir_colonnes
+from export import NB_LIGNES_MAX_EXCEL, exporter
+from graphiques import (agregat_valeurs_manquantes, comptages_principaux, figure_boites, figure_circulaire,
+                        figure_valeurs_manquantes, resume_boite)
+from instrumentation import Instrumentation
+from memoire import optimiser_memoire
+from nettoyage import nettoyer_donnees_aberrantes, nettoyer_donnees_manquantes
+from pipeline import PipelineTransformations, creer_cache_pipeline, supprimer_lignes_condition, tronquer_lignes
+from statistiques import calculer_statistiques, statistiques_en_flux
+from visionneuse import extraire_page, masque_condition, ordre_tri, positions_visibles
+
+TAILLES_DEFAUT = (10_000, 100_000, 1_000_000)
+PROFILS = ("numerique", "categoriel", "mixte")
+TAUX_MANQUANTS = 0.05
+# Écart relatif de durée toléré par rapport aux mesures de référence
+TOLERANCE_DEFAUT = 0.25
+# En dessous de cette durée (en secondes), les écarts relèvent du bruit de mesure
+DUREE_MINIMALE_COMPARAISON = 0.05
+
+
+# Fonction pour générer une base synthétique reproductible, avec des valeurs manquantes
+def generer_donnees(nb_lignes, profil="mixte", taux_manquants=TAUX_MANQUANTS, graine=0):
+    generateur = np.random.default_rng(graine)
+    colonnes = {}
+    if profil in ("numerique", "mixte"):
+        colonnes["mesure"] = generateur.normal(50, 10, nb_lignes)
+        colonnes["montant"] = generateur.lognormal(3, 1, nb_lignes)
+        colonnes["quantite"] = generateur.integers(0, 1000, nb_lignes).astype(float)
+    if profil in ("categoriel", "mixte"):
+        colonnes["ville"] = generateur.choice(["Paris", "Lyon", "Lomé", "Dakar", "Abidjan", "Lille"], nb_lignes)
+        colonnes["segment"] = generateur.choice(list("ABCDEFGHIJ"), nb_lignes)
+        colonnes["code"] = pd.Series(generateur.integers(0, nb_lignes, nb_lignes)).astype(str).radd("C").to_numpy()
+    if profil == "categoriel":
+        colonnes["quantite"] = generateur.integers(0, 1000, nb_lignes).astype(float)
+    data = pd.DataFrame(colonnes)
+    for colonne in data.columns:
+        manquants = generateur.random(nb_lignes) < taux_manquants
+        data[colonne] = data[colonne].mask(manquants)
+    return data
+
+
+# Scénarios mesurés : chacun reprend le calcul d'une fonction de data_analyse.py, sans Streamlit
+def scenarios(data, contenu_csv, repertoire):
+    numeriques = [c for c in data.columns if est_numerique(data[c])]
+    categorielles = [c for c in data.columns if c not in numeriques]
+    premiere = data.columns[0]
+
+    def pipeline_complet(cache):
+        pipeline = PipelineTransformations(data, cache)
+        pipeline.appliquer("tronquer_lignes", tronquer_lignes, option="Au début", nombre=10)
+        pipeline.appliquer("nettoyer_donnees_manquantes", nettoyer_donnees_manquantes, method="Supprimer")
+        return pipeline.donnees
+
+    # À froid, chaque exécution part d'un cache vide ; à chaud, le cache est rempli au préalable
+    cache_chaud = creer_cache_pipeline()
+    pipeline_complet(cache_chaud)
+
+    # Le classeur lu est celui écrit par le scénario d'export XLSX, exécuté juste avant
+    chemin_xlsx = os.path.join(repertoire, "export.xlsx")
+
+    def charger_xlsx():
+        with open(chemin_xlsx, "rb") as f:
+            return charger_contenu("base.xlsx", f.read())
+
+    mesures = [
+        ("charger_avec_empreinte", lambda: charger_contenu("base.csv", contenu_csv)),
+        ("calculer_statistiques_en_flux", lambda: statistiques_en_flux(io.BytesIO(contenu_csv))),
+        ("afficher_statistiques", lambda: calculer_statistiques(data)),
+        ("optimiser_memoire", lambda: optimiser_memoire(data)),
+        ("convert_column_type", lambda: convertir_colonnes(data[[premiere]].astype(str), [premiere], ["flottant"])),
+        ("afficher_tableau", lambda: extraire_page(data, positions_visibles(
+            len(data), ordre_tri(data, premiere), masque_condition(data, premiere, "est vide")), 1, 100)),
+        ("supprimer_lignes_choisies", lambda: supprimer_lignes_condition(data, premiere, "est vide")),
+        ("traiter_valeurs_aberrantes", lambda: detecter_aberrantes(data, approximatif=True)),
+        ("nettoyer_donnees_aberrantes", lambda: nettoyer_donnees_aberrantes(data, approximatif=True)),
+        ("nettoyer_donnees_manquantes", lambda: nettoyer_donnees_manquantes(data, "Supprimer")),
+        ("nettoyer_donnees_manquantes (médiane par groupe)", lambda: nettoyer_donnees_manquantes(
+            data, "Remplir avec la médiane", groupe=categorielles[0] if categorielles else None, approximatif=True)),
+        ("plot_missing_values", lambda: figure_valeurs_manquantes(agregat_valeurs_manquantes(data)).clear()),
+        ("afficher_boites_a_moustaches", lambda: figure_boites(
+            [resume_boite(data[c]) for c in numeriques]).clear() if numeriques else None),
+        ("creer_tableaux_de_bord", lambda: [figure_circulaire(comptages_principaux(data[c]), c).clear()
+                                            for c in categorielles]),
+        ("proposer_telechargement (CSV)", lambda: exporter(data, "CSV", os.path.join(repertoire, "export.csv"))),
+        ("proposer_telechargement (Parquet)",
+         lambda: exporter(data, "Parquet", os.path.join(repertoire, "export.parquet"))),
+        ("pipeline", lambda: pipeline_complet(creer_cache_pipeline())),
+        ("pipeline (depuis le cache)", lambda: pipeline_complet(cache_chaud)),
+    ]
+    # Au-delà d'une feuille Excel, l'export XLSX est refusé : les deux scénarios Excel sont omis
+    if len(data) < NB_LIGNES_MAX_EXCEL:
+        mesures += [
+            ("proposer_telechargement (XLSX)", lambda: exporter(data, "XLSX", chemin_xlsx)),
+            ("charger_avec_empreinte (XLSX)", charger_xlsx),
+        ]
+    return mesures
+
+
+# Fonction pour exécuter tous les scénarios sur chaque taille et chaque profil ; rend les mesures
+def executer(tailles=TAILLES_DEFAUT, profils=PROFILS, repetitions=1):
+    resultats = []
+    with tempfile.TemporaryDirectory() as repertoire:
+        for nb_lignes in tailles:
+            for profil in profils:
+                data = generer_donnees(nb_lignes, profil)
+                contenu_csv = data.to_csv(index=False).encode()
+                for nom, calcul in scenarios(data, contenu_csv, repertoire):
+                    # Durées et mémoire sont mesurées séparément : tracemalloc fausserait les durées
+                    chronometre = Instrumentation(suivre_memoire=False)
+                    for _ in range(repetitions):
+                        with chronometre.mesurer(nom, data):
+                            calcul()
+                    memoire = Instrumentation()
+                    with memoire.mesurer(nom, data):
+                        calcul()
+                    duree = min(mesure["duree"] for mesure in chronometre.mesures)
+                    resultats.append({"scenario": nom, "profil": profil, "lignes": nb_lignes, "duree": duree,
+                                      "pic_memoire_mo": memoire.mesures[0]["pic_memoire_mo"]})
+                    print(f"{nb_lignes:>10} {profil:<10} {nom:<36} {duree:>9.3f} s", file=sys.stderr)
+    return resultats
+
+
+# Fonction pour comparer les mesures à une référence ; rend les scénarios ralentis au-delà de la tolérance
+def regressions(resultats, reference, tolerance=TOLERANCE_DEFAUT):
+    anciennes = {(r["scenario"], r["profil"], r["lignes"]): r["duree"] for r in reference}
+    ralentis = []
+    for resultat in resultats:
+        ancienne = anciennes.get((resultat["scenario"], resultat["profil"], resultat["lignes"]))
+        if ancienne is None or max(ancienne, resultat["duree"]) < DUREE_MINIMALE_COMPARAISON:
+            continue
+        if resultat["duree"] > ancienne * (1 + tolerance):
+            ralentis.append({**resultat, "duree_reference": ancienne})
+    return ralentis
+
+
+def main(arguments=None):
+    parseur = argparse.ArgumentParser(description="Mesure la durée et la mémoire de chaque étape de l'analyse "
+                                                  "sur des bases synthétiques.")
+    parseur.add_argument("--tailles", type=float, nargs="+", default=TAILLES_DEFAUT,
+                         help="nombres de lignes (ex. 1e4 1e5 1e6 1e7)")
+    parseur.add_argument("--profils", nargs="+", default=PROFILS, choices=PROFILS)
+    parseur.add_argument("--repetitions", type=int, default=1, help="la meilleure durée est retenue")
+    parseur.add_argument("--sortie", default="benchmark.json", help="fichier JSON des mesures")
+    parseur.add_argument("--reference", help="mesures précédentes (JSON) auxquelles se comparer")
+    parseur.add_argument("--tolerance", type=float, default=TOLERANCE_DEFAUT,
+                         help="ralentissement relatif toléré (0.25 = 25 %%)")
+    arguments = parseur.parse_args(arguments)
+
+    resultats = executer([int(taille) for taille in arguments.tailles], arguments.profils, arguments.repetitions)
+    with open(arguments.sortie, "w", encoding="utf-8") as f:
+        json.dump(resultats, f, ensure_ascii=False, indent=2)
+    print(pd.DataFrame(resultats).to_string(index=False))
+
+    if arguments.reference:
+        with open(arguments.reference, encoding="utf-8") as f:
+            ralentis = regressions(resultats, json.load(f), arguments.tolerance)
+        if ralentis:
+            print("\nRégressions :")
+            print(pd.DataFrame(ralentis).to_string(index=False))
+            return 1
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
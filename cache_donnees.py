@@ -0,0 +1,251 @@
+import hashlib
+import os
+import tempfile
+import threading
+import time
+from collections import OrderedDict
+
+import numpy as np
+import pandas as pd
+
+# Budget mémoire par défaut du cache de lecture (en octets)
+BUDGET_MEMOIRE_DEFAUT = 512 * 1024 * 1024
+# Les bases déversées sur disque et non relues depuis cette durée (en secondes) sont supprimées
+DUREE_CONSERVATION_DISQUE = 7 * 24 * 3600
+# Budget mémoire par défaut du cache des résultats calculés (en octets) : ordres de tri, masques et positions
+# ont une case par ligne
+BUDGET_RESULTATS_DEFAUT = 256 * 1024 * 1024
+# Taille maximale (en octets) du répertoire de déversement ; les bases les moins récemment lues sont supprimées
+TAILLE_MAX_DISQUE_DEFAUT = 4 * 1024 * 1024 * 1024
+# Nombre de lignes sur lesquelles est estimée la taille des objets Python (chaînes) d'une colonne
+TAILLE_ECHANTILLON_OBJETS = 1000
+
+
+# Fonction pour calculer l'empreinte d'un contenu et de ses paramètres de lecture
+def empreinte_contenu(contenu, *parametres):
+    h = hashlib.blake2b(digest_size=16)
+    h.update(contenu)
+    return _ajouter_parametres(h, parametres)
+
+
+# Fonction pour calculer la même empreinte qu'empreinte_contenu en lisant un fichier par morceaux,
+# sans copier son contenu en mémoire
+def empreinte_fichier(fichier, *parametres, taille_morceau=1024 * 1024):
+    h = hashlib.blake2b(digest_size=16)
+    fichier.seek(0)
+    for morceau in iter(lambda: fichier.read(taille_morceau), b""):
+        h.update(morceau)
+    fichier.seek(0)
+    return _ajouter_parametres(h, parametres)
+
+
+def _ajouter_parametres(h, parametres):
+    for parametre in parametres:
+        h.update(b"\x00")
+        h.update(repr(parametre).encode())
+    return h.hexdigest()
+
+
+# Fonction pour supprimer d'un répertoire les fichiers inutilisés depuis duree_max secondes, puis les moins
+# récemment utilisés (date de modification) tant que le total dépasse taille_max octets ; un fichier en cours
+# d'écriture (terminé par suffixe_partiel) n'est supprimé que s'il est ancien
+def nettoyer_repertoire(repertoire, duree_max, taille_max, suffixe_partiel):
+    limite = time.time() - duree_max
+    restants = []
+    for entree in os.scandir(repertoire):
+        try:
+            infos = entree.stat()
+            if infos.st_mtime < limite:
+                os.remove(entree.path)
+            elif not entree.name.endswith(suffixe_partiel):
+                restants.append((infos.st_mtime, infos.st_size, entree.path))
+        except OSError:
+            # Fichier supprimé entre-temps par une autre session
+            continue
+    taille_totale = sum(taille for _, taille, _ in restants)
+    for _, taille, chemin in sorted(restants):
+        if taille_totale <= taille_max:
+            break
+        try:
+            os.remove(chemin)
+        except OSError:
+            pass
+        taille_totale -= taille
+
+
+# Fonction pour estimer la taille en mémoire d'une base de données sans la parcourir en entier :
+# la taille des objets Python (chaînes) est extrapolée à partir d'un échantillon de lignes.
+# Sans objets, seuls les tableaux et les pointeurs vers les objets sont comptés
+def taille_en_memoire(data, objets=True):
+    taille = int(data.memory_usage(index=True, deep=False).sum())
+    colonnes_objets = [i for i, t in enumerate(data.dtypes) if t == object]
+    if not objets or not colonnes_objets or len(data) == 0:
+        return taille
+    lignes = np.unique(np.linspace(0, len(data) - 1, TAILLE_ECHANTILLON_OBJETS).astype(np.int64))
+    echantillon = data.iloc[lignes, colonnes_objets]
+    profonde = echantillon.memory_usage(index=False, deep=True).sum()
+    superficielle = echantillon.memory_usage(index=False, deep=False).sum()
+    return taille + int((profonde - superficielle) * len(data) / len(lignes))
+
+
+# Fonction pour estimer la taille en mémoire d'un résultat calculé (tableau, série ou base) ; les petits
+# résultats (dictionnaires, rapports, nombres) comptent pour zéro et ne sont bornés que par le nombre d'entrées
+def taille_resultat(valeur):
+    if isinstance(valeur, (pd.Series, pd.DataFrame)):
+        return int(np.sum(valeur.memory_usage(index=True, deep=False)))
+    return int(getattr(valeur, "nbytes", 0))
+
+
+# Cache LRU borné en mémoire et, éventuellement, en nombre d'entrées ; chaque entrée garde sa valeur,
+# sa taille estimée et des détails facultatifs
+class CacheLRU:
+    def __init__(self, budget_octets, nb_entrees_max=None):
+        self.budget_octets = budget_octets
+        self.nb_entrees_max = nb_entrees_max
+        self._entrees = OrderedDict()
+        self._taille_totale = 0
+        self._verrou = threading.Lock()
+
+    def __len__(self):
+        return len(self._entrees)
+
+    @property
+    def taille_totale(self):
+        return self._taille_totale
+
+    def vider(self):
+        with self._verrou:
+            self._entrees.clear()
+            self._taille_totale = 0
+
+    # Rend l'entrée (valeur, taille, détails) en la marquant comme la plus récente, ou None
+    def _lire(self, cle):
+        with self._verrou:
+            if cle in self._entrees:
+                self._entrees.move_to_end(cle)
+                return self._entrees[cle]
+        return None
+
+    # Stocke une entrée ; rend les entrées évincées, sous forme de couples (clé, valeur)
+    def _stocker(self, cle, valeur, taille, details=None):
+        with self._verrou:
+            if cle in self._entrees:
+                self._taille_totale -= self._entrees.pop(cle)[1]
+            self._entrees[cle] = (valeur, taille, details)
+            self._taille_totale += taille
+            return self._evincer()
+
+    # On garde toujours la dernière entrée, même si elle dépasse le budget à elle seule
+    def _evincer(self):
+        evincees = []
+        while len(self._entrees) > 1 and (self._taille_totale > self.budget_octets or (
+                self.nb_entrees_max is not None and len(self._entrees) > self.nb_entrees_max)):
+            cle, (valeur, taille, _) = self._entrees.popitem(last=False)
+            self._taille_totale -= taille
+            evincees.append((cle, valeur))
+        return evincees
+
+
+# Cache des résultats calculés à partir des données (agrégats des graphiques, rapports, ordres de tri,
+# masques, positions, noms de feuilles), indexé par l'empreinte des données et la nature du calcul
+class CacheResultats(CacheLRU):
+    def __init__(self, budget_octets=BUDGET_RESULTATS_DEFAUT, nb_entrees_max=256):
+        super().__init__(budget_octets, nb_entrees_max)
+
+    # Rend le résultat gardé en cache, ou le calcule et le garde
+    def obtenir(self, cle, calcul):
+        entree = self._lire(cle)
+        if entree is not None:
+            return entree[0]
+        valeur = calcul()
+        self._stocker(cle, valeur, taille_resultat(valeur))
+        return valeur
+
+
+# Cache LRU des bases de données déjà lues, avec budget mémoire et déversement optionnel sur disque.
+# compter_objets=False ne compte pas les chaînes elles-mêmes : utile quand les bases stockées partagent
+# les objets d'une même source, qui seraient sinon comptés une fois par base
+class CacheDonnees(CacheLRU):
+    def __init__(self, budget_octets=BUDGET_MEMOIRE_DEFAUT, repertoire_disque=None, format_disque="parquet",
+                 compter_objets=True, taille_max_disque=TAILLE_MAX_DISQUE_DEFAUT,
+                 duree_max_disque=DUREE_CONSERVATION_DISQUE):
+        if format_disque not in ("parquet", "feather"):
+            raise ValueError("Format de déversement non pris en charge.")
+        super().__init__(budget_octets)
+        self.compter_objets = compter_objets
+        self.repertoire_disque = repertoire_disque
+        self.format_disque = format_disque
+        self.taille_max_disque = taille_max_disque
+        self.duree_max_disque = duree_max_disque
+        if repertoire_disque is not None:
+            os.makedirs(repertoire_disque, exist_ok=True)
+            self._nettoyer_disque()
+
+    def __contains__(self, cle):
+        with self._verrou:
+            if cle in self._entrees:
+                return True
+        chemin = self._chemin_disque(cle)
+        return chemin is not None and os.path.exists(chemin)
+
+    # La base stockée est rendue sans copie : les étapes de transformation ne modifient pas leur entrée
+    def obtenir(self, cle):
+        entree = self._lire(cle)
+        if entree is not None:
+            return entree[0]
+        data = self._lire_disque(cle)
+        if data is not None:
+            self.ajouter(cle, data)
+        return data
+
+    # Les détails (rapport d'une étape par exemple) sont conservés tant que l'entrée reste en mémoire
+    def obtenir_details(self, cle):
+        with self._verrou:
+            if cle in self._entrees:
+                return self._entrees[cle][2]
+        return None
+
+    def ajouter(self, cle, data, details=None):
+        evincees = self._stocker(cle, data, taille_en_memoire(data, self.compter_objets), details)
+        for cle_evincee, data_evincee in evincees:
+            self._ecrire_disque(cle_evincee, data_evincee)
+
+    def _chemin_disque(self, cle):
+        if self.repertoire_disque is None:
+            return None
+        return os.path.join(self.repertoire_disque, f"{cle}.{self.format_disque}")
+
+    def _ecrire_disque(self, cle, data):
+        chemin = self._chemin_disque(cle)
+        if chemin is None or os.path.exists(chemin):
+            return
+        # Fichier d'écriture propre à cet appel : deux sessions peuvent déverser la même base
+        descripteur, temporaire = tempfile.mkstemp(suffix=".tmp", dir=self.repertoire_disque)
+        os.close(descripteur)
+        try:
+            if self.format_disque == "parquet":
+                data.to_parquet(temporaire)
+            else:
+                data.reset_index(drop=True).to_feather(temporaire)
+            os.replace(temporaire, chemin)
+        except Exception:
+            # Colonnes de types mixtes ou pyarrow absent : l'entrée est simplement oubliée
+            if os.path.exists(temporaire):
+                os.remove(temporaire)
+        self._nettoyer_disque()
+
+    def _nettoyer_disque(self):
+        nettoyer_repertoire(self.repertoire_disque, self.duree_max_disque, self.taille_max_disque, ".tmp")
+
+    def _lire_disque(self, cle):
+        chemin = self._chemin_disque(cle)
+        if chemin is None or not os.path.exists(chemin):
+            return None
+        try:
+            # La date de modification sert de date de dernière utilisation
+            os.utime(chemin)
+            if self.format_disque == "parquet":
+                return pd.read_parquet(chemin)
+            return pd.read_feather(chemin)
+        except Exception:
+            return None
@@ -0,0 +1,410 @@
+import csv
+import hashlib
+import io
+import json
+import multiprocessing
+import os
+import re
+import tempfile
+import threading
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+import pandas as pd
+import requests
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+
+from cache_donnees import empreinte_contenu
+
+REPERTOIRE_TELECHARGEMENTS = os.path.join(tempfile.gettempdir(), "analyse_telechargements")
+# Délai de connexion et de lecture (en secondes)
+DELAI_REQUETE = (5, 60)
+# Pendant cette durée (en secondes), un fichier téléchargé est réutilisé sans interroger le serveur
+DUREE_VALIDITE = 300
+TAILLE_MORCEAU = 1024 * 1024
+# Taille (en octets) à partir de laquelle plusieurs feuilles Excel sont lues en parallèle
+TAILLE_MIN_LECTURE_PARALLELE = 1024 * 1024
+
+# Taille de l'échantillon (en octets) examiné pour reconnaître la structure d'un fichier texte
+TAILLE_ECHANTILLON = 64 * 1024
+# Nombre maximal de lignes de l'échantillon analysées
+NB_LIGNES_ECHANTILLON = 200
+DELIMITEURS_CANDIDATS = (",", ";", "\t", "|")
+# latin-1 sert de dernier recours : il décode n'importe quelle suite d'octets
+ENCODAGES_CANDIDATS = ("utf-8", "cp1252")
+MOTIF_ENTIER = re.compile(r"^[+-]?\d+$")
+MOTIF_DECIMAL_POINT = re.compile(r"^[+-]?\d*\.\d+(?:[eE][+-]?\d+)?$")
+MOTIF_DECIMAL_VIRGULE = re.compile(r"^[+-]?\d*,\d+$")
+
+try:
+    import pyarrow  # noqa: F401
+    PYARROW_DISPONIBLE = True
+except ImportError:
+    PYARROW_DISPONIBLE = False
+
+try:
+    import python_calamine  # noqa: F401
+    # Le moteur calamine n'existe qu'à partir de pandas 2.2
+    CALAMINE_DISPONIBLE = tuple(int(v) for v in pd.__version__.split(".")[:2]) >= (2, 2)
+except ImportError:
+    CALAMINE_DISPONIBLE = False
+
+
+# Fonction pour détecter le format d'un fichier ; rend l'extension et, pour les fichiers texte,
+# les options de lecture reconnues sur un échantillon
+def detecter_format(nom, contenu):
+    extension = nom.split(".")[-1].lower()
+    if extension in ["xlsx", "xls"]:
+        return extension, None
+    elif extension in ["csv", "txt"]:
+        return extension, sniffer_texte(contenu[:TAILLE_ECHANTILLON], extension, complet=len(contenu) < TAILLE_ECHANTILLON)
+    else:
+        raise ValueError("Format de fichier non pris en charge.")
+
+
+# Fonction pour reconnaître l'encodage d'un échantillon ; rend l'encodage et le texte décodé
+def detecter_encodage(echantillon, complet=True):
+    if echantillon.startswith(b"\xef\xbb\xbf"):
+        return "utf-8-sig", echantillon[3:].decode("utf-8", errors="replace")
+    if echantillon.startswith((b"\xff\xfe", b"\xfe\xff")):
+        return "utf-16", echantillon.decode("utf-16", errors="replace")
+    for encodage in ENCODAGES_CANDIDATS:
+        try:
+            return encodage, echantillon.decode(encodage)
+        except UnicodeDecodeError as erreur:
+            # Un caractère multi-octets peut être coupé à la fin de l'échantillon
+            if not complet and erreur.start >= len(echantillon) - 3:
+                return encodage, echantillon[:erreur.start].decode(encodage)
+    return "latin-1", echantillon.decode("latin-1")
+
+
+# Type d'une valeur de l'échantillon : "entier", "point", "virgule", "vide" ou "texte"
+def _type_valeur(valeur):
+    valeur = valeur.strip()
+    if valeur == "":
+        return "vide"
+    if MOTIF_ENTIER.match(valeur):
+        return "entier"
+    if MOTIF_DECIMAL_POINT.match(valeur):
+        return "point"
+    if MOTIF_DECIMAL_VIRGULE.match(valeur):
+        return "virgule"
+    return "texte"
+
+
+# Découpage des lignes de l'échantillon selon un délimiteur (None : suites d'espaces)
+def _decouper(lignes, delimiter, quotechar='"'):
+    if delimiter is None:
+        return [ligne.split() for ligne in lignes]
+    return list(csv.reader(lignes, delimiter=delimiter, quotechar=quotechar))
+
+
+# Vrai si une case de type donné peut appartenir à une colonne dont l'échantillon a ces types
+def _case_compatible(type_case, types_colonne):
+    if type_case == "vide":
+        return True
+    if type_case == "texte":
+        return False
+    remplis = {t for t in types_colonne if t != "vide"}
+    # Un entier peut figurer dans une colonne décimale
+    return type_case in remplis or (type_case == "entier" and bool(remplis & {"point", "virgule"}))
+
+
+# Choix du délimiteur donnant le nombre de champs le plus régulier d'une ligne à l'autre
+def _choisir_delimiter(lignes, quotechar, extension):
+    candidats = DELIMITEURS_CANDIDATS + ((None,) if extension == "txt" else ())
+    meilleur, meilleur_score = None if extension == "txt" else ",", (0, 0)
+    for delimiter in candidats:
+        nb_champs = [len(champs) for champs in _decouper(lignes, delimiter, quotechar)]
+        mode = max(set(nb_champs), key=nb_champs.count)
+        if mode < 2:
+            continue
+        score = (round(nb_champs.count(mode) / len(nb_champs), 2), mode)
+        if score > meilleur_score:
+            meilleur, meilleur_score = delimiter, score
+    return meilleur
+
+
+# Fonction pour reconnaître la structure d'un fichier texte à partir d'un échantillon borné :
+# encodage, délimiteur, guillemets, séparateur décimal, ligne d'en-tête et types des colonnes.
+# Rend les options à passer à pd.read_csv
+def sniffer_texte(echantillon, extension="csv", complet=True):
+    encodage, texte = detecter_encodage(echantillon, complet)
+    lignes = texte.splitlines()
+    if not complet and len(lignes) > 1:
+        lignes = lignes[:-1]  # La dernière ligne de l'échantillon peut être incomplète
+    lignes = [ligne for ligne in lignes[:NB_LIGNES_ECHANTILLON] if ligne.strip()]
+    if not lignes:
+        raise pd.errors.EmptyDataError("Fichier vide!")
+
+    quotechar = "'" if "'" in texte and '"' not in texte and re.search(r"(^|[,;\t|])'", texte, re.M) else '"'
+    delimiter = _choisir_delimiter(lignes, quotechar, extension)
+    lignes_decoupees = _decouper(lignes, delimiter, quotechar)
+    nb_colonnes = max(len(champs) for champs in lignes_decoupees)
+    types = [[_type_valeur(champs[i]) if i < len(champs) else "vide" for champs in lignes_decoupees[1:]]
+             for i in range(nb_colonnes)]
+
+    # Comme pour pandas, la première ligne est un en-tête ; elle n'est lue comme des données que si aucune
+    # de ses cases n'est du texte et que chacune a le type de sa colonne
+    premiere = [_type_valeur(champ) for champ in lignes_decoupees[0]]
+    en_tete = (len(lignes_decoupees) < 2 or all(t == "vide" for t in premiere)
+               or not all(_case_compatible(t, types_colonne) for t, types_colonne in zip(premiere, types)))
+
+    options = {"delimiter": delimiter if delimiter is not None else r"\s+", "encoding": encodage}
+    if quotechar != '"':
+        options["quotechar"] = quotechar
+    if not en_tete:
+        options["header"] = None
+    # La virgule décimale n'est possible que si elle ne sert pas de délimiteur
+    tous_types = [t for types_colonne in types for t in types_colonne]
+    if delimiter != "," and tous_types.count("virgule") > tous_types.count("point"):
+        options["decimal"] = ","
+
+    # Types explicites pour les colonnes numériques : le lecteur n'a pas à les deviner
+    noms = lignes_decoupees[0] if en_tete else list(range(nb_colonnes))
+    if len(set(noms)) == len(noms) == nb_colonnes:
+        separateur_decimal = "virgule" if options.get("decimal") == "," else "point"
+        dtype = {}
+        for nom, types_colonne in zip(noms, types):
+            remplis = {t for t in types_colonne if t != "vide"}
+            if not remplis or not remplis <= {"entier", separateur_decimal}:
+                continue
+            # Une colonne entière avec des valeurs manquantes est lue en flottants, comme le ferait pandas
+            entiere = remplis == {"entier"} and "vide" not in types_colonne
+            dtype[nom] = "int64" if entiere else "float64"
+        if dtype:
+            options["dtype"] = dtype
+    return options
+
+
+# Fonction pour choisir le moteur de lecture d'un fichier texte : pyarrow (multi-fils) quand il est
+# installé et que les options le permettent, sinon le moteur C
+def moteur_texte(options):
+    if PYARROW_DISPONIBLE and options["delimiter"] != r"\s+" and "decimal" not in options:
+        return "pyarrow"
+    return "c"
+
+
+# Fonction pour lire le contenu d'un fichier selon son format
+def lire_contenu(contenu, extension, options=None):
+    if extension in ["xlsx", "xls"]:
+        return pd.read_excel(io.BytesIO(contenu), engine=moteur_excel(extension))
+    elif extension in ["csv", "txt"]:
+        options = options if options is not None else sniffer_texte(contenu[:TAILLE_ECHANTILLON], extension,
+                                                                     complet=len(contenu) < TAILLE_ECHANTILLON)
+        try:
+            return pd.read_csv(io.BytesIO(contenu), engine=moteur_texte(options), **options)
+        except ValueError:
+            # Types de l'échantillon démentis plus loin dans le fichier, ou option refusée par pyarrow :
+            # relecture avec le moteur C et les types devinés par pandas
+            options = {cle: valeur for cle, valeur in options.items() if cle != "dtype"}
+            return pd.read_csv(io.BytesIO(contenu), engine="c", **options)
+    else:
+        raise ValueError("Format de fichier non pris en charge.")
+
+
+# Fonction pour choisir le moteur de lecture Excel : calamine (Rust) s'il est installé et pris en charge
+# par pandas, sinon openpyxl en lecture seule pour .xlsx et xlrd pour .xls
+def moteur_excel(extension):
+    if CALAMINE_DISPONIBLE:
+        return "calamine"
+    return "xlrd" if extension == "xls" else "openpyxl"
+
+
+# Fonction pour lister les feuilles d'un classeur ; avec xlrd, seules les métadonnées sont lues,
+# sans analyser le contenu des feuilles
+def lister_feuilles(contenu, extension):
+    if moteur_excel(extension) == "xlrd":
+        import xlrd
+        classeur = xlrd.open_workbook(file_contents=contenu, on_demand=True)
+        try:
+            return classeur.sheet_names()
+        finally:
+            classeur.release_resources()
+    with pd.ExcelFile(io.BytesIO(contenu), engine=moteur_excel(extension)) as classeur:
+        return classeur.sheet_names
+
+
+# Lecture d'une feuille, éventuellement limitée à certaines colonnes et à une plage de lignes ;
+# le classeur est donné par son contenu ou par le chemin d'un fichier
+def _lire_feuille(contenu, extension, feuille, colonnes=None, lignes=None):
+    options = {}
+    if lignes is not None:
+        debut, nombre = lignes
+        if debut:
+            # La ligne d'en-tête est gardée, les lignes de données avant le début sont sautées
+            options["skiprows"] = range(1, debut + 1)
+        if nombre:
+            options["nrows"] = nombre
+    source = io.BytesIO(contenu) if isinstance(contenu, bytes) else contenu
+    return pd.read_excel(source, sheet_name=feuille, usecols=colonnes,
+                         engine=moteur_excel(extension), **options)
+
+
+# Fonction pour lire plusieurs feuilles d'un classeur, en parallèle pour les gros classeurs ;
+# chaque feuille lue est gardée dans le cache. Plusieurs feuilles sont empilées avec une colonne « feuille »
+def lire_excel(contenu, extension, feuilles=None, colonnes=None, lignes=None, cache=None, empreinte=None):
+    empreinte = empreinte or empreinte_contenu(contenu, extension)
+    if not feuilles:
+        feuilles = lister_feuilles(contenu, extension)[:1]
+    cles = {feuille: empreinte_contenu(empreinte.encode(), feuille, colonnes, lignes) for feuille in feuilles}
+    lues = {}
+    if cache is not None:
+        for feuille in feuilles:
+            data = cache.obtenir(cles[feuille])
+            if data is not None:
+                lues[feuille] = data
+    a_lire = [feuille for feuille in feuilles if feuille not in lues]
+    if len(a_lire) > 1 and len(contenu) > TAILLE_MIN_LECTURE_PARALLELE:
+        # openpyxl est écrit en Python pur : des processus plutôt que des fils d'exécution. Ils sont démarrés
+        # par spawn (pas de fork d'un serveur multi-fils) et relisent le classeur depuis un fichier temporaire,
+        # au lieu d'en recevoir chacun une copie
+        descripteur, chemin = tempfile.mkstemp(suffix=f".{extension}")
+        try:
+            with os.fdopen(descripteur, "wb") as f:
+                f.write(contenu)
+            with ProcessPoolExecutor(max_workers=min(len(a_lire), os.cpu_count() or 1),
+                                     mp_context=multiprocessing.get_context("spawn")) as executeur:
+                taches = {feuille: executeur.submit(_lire_feuille, chemin, extension, feuille, colonnes, lignes)
+                          for feuille in a_lire}
+                for feuille, tache in taches.items():
+                    lues[feuille] = tache.result()
+        finally:
+            os.remove(chemin)
+    else:
+        for feuille in a_lire:
+            lues[feuille] = _lire_feuille(contenu, extension, feuille, colonnes, lignes)
+    if cache is not None:
+        for feuille in a_lire:
+            cache.ajouter(cles[feuille], lues[feuille])
+
+    cle = empreinte_contenu(empreinte.encode(), tuple(feuilles), colonnes, lignes)
+    if len(feuilles) == 1:
+        return lues[feuilles[0]], cle
+    data = pd.concat([lues[feuille] for feuille in feuilles], keys=feuilles, names=["feuille", None])
+    return data.reset_index(level=0).reset_index(drop=True), cle
+
+
+# Fonction pour charger le contenu d'un fichier ; rend la base et l'empreinte du contenu
+def charger_contenu(nom, contenu, cache=None, feuilles=None, colonnes=None, lignes=None):
+    extension, options = detecter_format(nom, contenu)
+    cle = empreinte_contenu(contenu, extension, sorted((options or {}).items()))
+    if extension in ["xlsx", "xls"]:
+        return lire_excel(contenu, extension, feuilles, colonnes, lignes, cache, empreinte=cle)
+    if cache is None:
+        return lire_contenu(contenu, extension, options), cle
+    data = cache.obtenir(cle)
+    if data is None:
+        data = lire_contenu(contenu, extension, options)
+        cache.ajouter(cle, data)
+    return data, cle
+
+
+# Fonction pour créer une session HTTP qui réutilise ses connexions et réessaie sur les erreurs passagères
+def creer_session(nb_connexions=10):
+    session = requests.Session()
+    reessais = Retry(total=3, backoff_factor=0.5, status_forcelist=(429, 502, 503, 504),
+                     allowed_methods=frozenset(["GET", "HEAD"]))
+    adaptateur = HTTPAdapter(pool_connections=nb_connexions, pool_maxsize=nb_connexions, max_retries=reessais)
+    session.mount("http://", adaptateur)
+    session.mount("https://", adaptateur)
+    return session
+
+
+# Téléchargeur avec cache disque : les requêtes sont conditionnelles (ETag / Last-Modified)
+# et le corps de la réponse est écrit par morceaux, sans jamais être chargé en entier en mémoire
+class ChargeurDistant:
+    def __init__(self, repertoire=REPERTOIRE_TELECHARGEMENTS, session=None,
+                 duree_validite=DUREE_VALIDITE, delai=DELAI_REQUETE):
+        self.repertoire = repertoire
+        self.session = session or creer_session()
+        self.duree_validite = duree_validite
+        self.delai = delai
+        self._verrou = threading.Lock()
+        self._verrous_url = {}
+        os.makedirs(repertoire, exist_ok=True)
+
+    # Un verrou par adresse : deux sessions ne téléchargent pas le même fichier en même temps,
+    # mais le téléchargement d'un fichier ne bloque pas celui des autres
+    def _verrou_url(self, url):
+        with self._verrou:
+            return self._verrous_url.setdefault(url, threading.Lock())
+
+    def _chemins(self, url):
+        nom = hashlib.blake2b(url.encode(), digest_size=16).hexdigest()
+        return os.path.join(self.repertoire, nom), os.path.join(self.repertoire, nom + ".json")
+
+    def _lire_metadonnees(self, chemin_meta):
+        try:
+            with open(chemin_meta, encoding="utf-8") as f:
+                return json.load(f)
+        except (OSError, ValueError):
+            return None
+
+    # Rend le chemin du fichier local et ses métadonnées (dont l'empreinte du contenu)
+    def telecharger(self, url):
+        chemin, chemin_meta = self._chemins(url)
+        with self._verrou_url(url):
+            meta = self._lire_metadonnees(chemin_meta)
+            if meta is not None and not os.path.exists(chemin):
+                meta = None
+            if meta is not None and time.time() - meta["verifie_le"] < self.duree_validite:
+                return chemin, meta
+
+            entetes = {}
+            if meta is not None:
+                if meta.get("etag"):
+                    entetes["If-None-Match"] = meta["etag"]
+                if meta.get("last_modified"):
+                    entetes["If-Modified-Since"] = meta["last_modified"]
+
+            with self.session.get(url, headers=entetes, stream=True, timeout=self.delai) as reponse:
+                if reponse.status_code == 304 and meta is not None:
+                    meta["verifie_le"] = time.time()
+                else:
+                    reponse.raise_for_status()
+                    meta = self._enregistrer(reponse, chemin)
+            with open(chemin_meta, "w", encoding="utf-8") as f:
+                json.dump(meta, f)
+            return chemin, meta
+
+    # Le contenu compressé à la volée (Content-Encoding: gzip) est décompressé pendant l'écriture
+    def _enregistrer(self, reponse, chemin):
+        empreinte = hashlib.blake2b(digest_size=16)
+        temporaire = chemin + ".partiel"
+        try:
+            with open(temporaire, "wb") as f:
+                for morceau in reponse.iter_content(chunk_size=TAILLE_MORCEAU):
+                    empreinte.update(morceau)
+                    f.write(morceau)
+            os.replace(temporaire, chemin)
+        finally:
+            if os.path.exists(temporaire):
+                os.remove(temporaire)
+        return {
+            "etag": reponse.headers.get("ETag"),
+            "last_modified": reponse.headers.get("Last-Modified"),
+            "gzip": est_gzip(chemin),
+            "empreinte": empreinte.hexdigest(),
+            "verifie_le": time.time(),
+        }
+
+    # Rend la base lue et l'empreinte de son contenu ; la base lue est gardée dans le cache fourni
+    def charger_csv(self, url, cache=None, **options):
+        chemin, meta = self.telecharger(url)
+        # Un fichier .gz servi tel quel est décompressé par le lecteur CSV, au fil de la lecture
+        options.setdefault("compression", "gzip" if meta["gzip"] else None)
+        cle = empreinte_contenu(meta["empreinte"].encode(), sorted(options.items()))
+        data = cache.obtenir(cle) if cache is not None else None
+        if data is None:
+            data = pd.read_csv(chemin, **options)
+            if cache is not None:
+                cache.ajouter(cle, data)
+        return data, cle
+
+
+# Fonction pour savoir si un fichier est compressé au format gzip
+def est_gzip(chemin):
+    with open(chemin, "rb") as f:
+        return f.read(2) == b"\x1f\x8b"
@@ -0,0 +1,22 @@
+import pandas as pd
+
+# Avant pandas 1.5, data[colonne] = valeurs peut écrire dans le tableau existant, partagé avec les copies
+# superficielles
+AFFECTATION_EN_PLACE = tuple(int(v) for v in pd.__version__.split(".")[:2]) < (1, 5)
+
+
+# Fonction pour savoir si une colonne (ou un type) est numérique : les booléens ne le sont pas
+def est_numerique(serie):
+    return pd.api.types.is_numeric_dtype(serie) and not pd.api.types.is_bool_dtype(serie)
+
+
+# Fonction pour savoir si une colonne est catégorielle : texte (objet ou chaîne) ou catégorie.
+# Les dates et les booléens n'en font pas partie
+def est_categorielle(serie):
+    return serie.dtype == object or isinstance(serie.dtype, (pd.CategoricalDtype, pd.StringDtype))
+
+
+# Fonction pour obtenir une copie de la base dont les colonnes peuvent être remplacées sans modifier
+# l'original (gardé dans un cache) ; les données ne sont copiées que si pandas l'exige
+def copie_modifiable(data):
+    return data.copy(deep=AFFECTATION_EN_PLACE)
@@ -0,0 +1,156 @@
+import numpy as np
+import pandas as pd
+
+from colonnes import copie_modifiable
+
+# Types proposés dans l'interface, avec le type pandas correspondant
+TYPES_DISPONIBLES = {
+    "flottant": "float64",
+    "entier": "Int64",
+    "double": "float64",
+    "chaine_caractère": "string",
+    "date": "datetime64[ns]",
+    "booléen": "boolean",
+    "flottant (float32)": "float32",
+    "entier (Int32)": "Int32",
+    "catégorie": "category",
+}
+
+# Formats de date essayés sur un échantillon avant la conversion complète
+FORMATS_DATE = (
+    "%Y-%m-%d", "%Y-%m-%d %H:%M:%S", "%Y-%m-%dT%H:%M:%S", "%Y-%m-%d %H:%M",
+    "%d/%m/%Y", "%d/%m/%Y %H:%M:%S", "%d/%m/%Y %H:%M", "%d/%m/%y",
+    "%m/%d/%Y", "%m/%d/%Y %H:%M:%S", "%d-%m-%Y", "%d.%m.%Y", "%Y/%m/%d", "%Y%m%d",
+)
+
+VALEURS_VRAIES = {"true", "vrai", "oui", "yes", "y", "o", "t", "1", "1.0"}
+VALEURS_FAUSSES = {"false", "faux", "non", "no", "n", "f", "0", "0.0"}
+
+TAILLE_ECHANTILLON = 1000
+# Part de l'échantillon à partir de laquelle un format est retenu sans essayer les suivants
+SEUIL_INFERENCE = 0.95
+# En dessous de cette part, aucun format n'est imposé et pandas devine le format de chaque valeur
+SEUIL_MINIMAL = 0.5
+NB_EXEMPLES_ECHECS = 3
+
+
+# Fonction pour tirer un échantillon des valeurs non manquantes d'une colonne, sous forme de texte
+def echantillon_texte(serie, taille=TAILLE_ECHANTILLON):
+    valeurs = serie.dropna()
+    if len(valeurs) > taille:
+        valeurs = valeurs.sample(taille, random_state=0)
+    return valeurs.astype(str).str.strip()
+
+
+# Fonction pour deviner un format de date unique à partir d'un échantillon
+def inferer_format_date(serie):
+    echantillon = echantillon_texte(serie)
+    if echantillon.empty:
+        return None
+    meilleur_format, meilleur_score = None, SEUIL_MINIMAL
+    for format_date in FORMATS_DATE:
+        reconnues = pd.to_datetime(echantillon, format=format_date, errors="coerce").notna().mean()
+        if reconnues >= SEUIL_INFERENCE:
+            return format_date
+        if reconnues > meilleur_score:
+            meilleur_format, meilleur_score = format_date, reconnues
+    return meilleur_format
+
+
+# Fonction pour deviner le séparateur décimal et celui des milliers à partir d'un échantillon
+def inferer_locale_numerique(serie):
+    echantillon = echantillon_texte(serie)
+    if echantillon.empty:
+        return ".", None
+    virgule_decimale = echantillon.str.fullmatch(r"[-+]?(?:\d{1,3}(?:[.\s]\d{3})*|\d+),\d+").mean()
+    point_decimal = echantillon.str.fullmatch(r"[-+]?(?:\d{1,3}(?:,\d{3})*|\d+)\.\d+").mean()
+    if virgule_decimale > point_decimal:
+        return ",", "."
+    if echantillon.str.contains(r"\d,\d{3}(?:\D|$)").any():
+        return ".", ","
+    return ".", None
+
+
+# Fonction pour convertir une colonne en nombres en une seule passe vectorisée
+def vers_numerique(serie):
+    if pd.api.types.is_bool_dtype(serie):
+        return serie.astype("float64")
+    if pd.api.types.is_numeric_dtype(serie):
+        return serie
+    decimal, milliers = inferer_locale_numerique(serie)
+    texte = serie.astype("string").str.strip()
+    # Les espaces (y compris insécables) servent aussi de séparateur de milliers
+    texte = texte.str.replace(" ", "", regex=False).str.replace("\u00a0", "", regex=False)
+    if milliers is not None:
+        texte = texte.str.replace(milliers, "", regex=False)
+    if decimal == ",":
+        texte = texte.str.replace(",", ".", regex=False)
+    return pd.to_numeric(texte, errors="coerce")
+
+
+# Fonction pour convertir une colonne en dates avec un format fixe lorsqu'il peut être deviné
+def vers_date(serie):
+    if pd.api.types.is_datetime64_any_dtype(serie):
+        return serie
+    if pd.api.types.is_numeric_dtype(serie):
+        return pd.to_datetime(serie, errors="coerce")
+    format_date = inferer_format_date(serie)
+    if format_date is not None:
+        return pd.to_datetime(serie.astype("string").str.strip(), format=format_date, errors="coerce")
+    return pd.to_datetime(serie, errors="coerce")
+
+
+# Fonction pour convertir une colonne en booléens nullables (les valeurs distinctes sont traduites une seule fois)
+def vers_booleen(serie):
+    if pd.api.types.is_bool_dtype(serie):
+        return serie.astype("boolean")
+    if pd.api.types.is_numeric_dtype(serie):
+        return (serie != 0).astype("boolean").mask(serie.isna())
+    codes, uniques = pd.factorize(serie)
+    normalisees = pd.Index(uniques).astype(str).str.strip().str.lower()
+    traduction = np.array([True if v in VALEURS_VRAIES else False if v in VALEURS_FAUSSES else None
+                           for v in normalisees] + [None], dtype=object)
+    return pd.Series(traduction[codes], index=serie.index, dtype="boolean")
+
+
+# Fonction pour convertir une colonne en entiers nullables, les valeurs décimales ou hors bornes étant rejetées
+def vers_entier(serie, type_cible):
+    nombres = vers_numerique(serie).astype("float64")
+    bornes = np.iinfo(type_cible.lower())
+    valides = (nombres % 1 == 0) & (nombres >= bornes.min) & (nombres <= bornes.max)
+    return nombres.where(valides).astype(type_cible)
+
+
+# Fonction pour convertir une colonne vers l'un des types de l'interface
+def convertir_colonne(serie, nouveau_type):
+    type_cible = TYPES_DISPONIBLES[nouveau_type]
+    if type_cible in ("Int64", "Int32"):
+        return vers_entier(serie, type_cible)
+    if type_cible in ("float64", "float32"):
+        return vers_numerique(serie).astype(type_cible)
+    if type_cible == "datetime64[ns]":
+        return vers_date(serie)
+    if type_cible == "boolean":
+        return vers_booleen(serie)
+    return serie.astype(type_cible)
+
+
+# Fonction pour convertir plusieurs colonnes ; les échecs sont comptés par colonne au lieu d'interrompre la conversion
+def convertir_colonnes(data, colonnes, nouveaux_types):
+    data = copie_modifiable(data)
+    echecs = []
+    for colonne, nouveau_type in zip(colonnes, nouveaux_types):
+        serie = data[colonne]
+        try:
+            convertie = convertir_colonne(serie, nouveau_type)
+        except (ValueError, TypeError) as erreur:
+            echecs.append((colonne, nouveau_type, int(serie.notna().sum()), str(erreur)))
+            continue
+        rejetees = serie.notna() & convertie.isna()
+        nb_rejetees = int(rejetees.sum())
+        if nb_rejetees:
+            exemples = ", ".join(map(str, serie[rejetees].unique()[:NB_EXEMPLES_ECHECS]))
+            echecs.append((colonne, nouveau_type, nb_rejetees, exemples))
+        data[colonne] = convertie
+    rapport = pd.DataFrame(echecs, columns=["Colonne", "Type demandé", "Valeurs non converties", "Exemples"])
+    return data, rapport
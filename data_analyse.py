@@ -1,162 +1,307 @@
 import streamlit as st
 import pandas as pd
-import matplotlib.pyplot as plt
-import requests
-from io import StringIO
-import io
-import base64
+import functools
+import json
+import os
 import time
 
+from aberrantes import METHODES_ABERRANTES, TAILLE_ECHANTILLON_QUANTILES, detecter_aberrantes
+from cache_donnees import (BUDGET_MEMOIRE_DEFAUT, TAILLE_MAX_DISQUE_DEFAUT, CacheDonnees, CacheResultats,
+                           empreinte_contenu, empreinte_fichier)
+from chargement import TAILLE_ECHANTILLON, ChargeurDistant, charger_contenu, detecter_format, lister_feuilles
+from colonnes import est_numerique
+from conversion import TYPES_DISPONIBLES, convertir_colonnes
+from export import FORMATS_EXPORT, exporter_vers_fichier_temporaire
+from graphiques import (agregat_valeurs_manquantes, comptages_principaux, figure_batons, figure_boites, figure_circulaire,
+                        figure_valeurs_manquantes, resume_boite)
+from instrumentation import Instrumentation
+from memoire import optimiser_memoire
+from nettoyage import METHODES_IMPUTATION, nettoyer_donnees_aberrantes, nettoyer_donnees_manquantes
+from pipeline import (BUDGET_PIPELINE_DEFAUT, PipelineTransformations, convertir_types, creer_cache_pipeline,
+                      empreinte_donnees, renommer_colonnes, supprimer_colonnes, supprimer_lignes_condition,
+                      supprimer_plage_lignes, tronquer_lignes)
+from statistiques import calculer_statistiques, statistiques_en_flux
+from visionneuse import OPERATEURS, TAILLES_PAGE, extraire_page, masque_condition, ordre_tri, positions_visibles
+
+# Nombre de lignes montrées dans les aperçus
+NB_LIGNES_APERCU = 100
+
+# Cache des bases de données lues, partagé entre les réexécutions du script
+@st.cache_resource
+def obtenir_cache_donnees():
+    repertoire = os.environ.get("ANALYSE_CACHE_DISQUE")
+    budget = int(os.environ.get("ANALYSE_CACHE_BUDGET_MO", BUDGET_MEMOIRE_DEFAUT // (1024 * 1024))) * 1024 * 1024
+    taille_disque = int(os.environ.get("ANALYSE_CACHE_DISQUE_MAX_MO",
+                                       TAILLE_MAX_DISQUE_DEFAUT // (1024 * 1024))) * 1024 * 1024
+    return CacheDonnees(budget_octets=budget, repertoire_disque=repertoire, taille_max_disque=taille_disque)
+
+# Fonction pour charger une base de données et calculer l'empreinte de son contenu
+def charger_avec_empreinte(fichier, cache=None, **options_excel):
+    fichier.seek(0)  # Remettre le curseur au début du fichier
+    return charger_contenu(fichier.name, fichier.read(), cache, **options_excel)
+
+# Fonction pour choisir les feuilles, les colonnes et les lignes à lire dans un classeur Excel
+def choisir_options_excel(fichier):
+    extension = fichier.name.split(".")[-1].lower()
+    if extension not in ["xlsx", "xls"]:
+        return {}
+    with st.sidebar.expander("Options de lecture Excel"):
+        # Les noms des feuilles sont gardés en cache : le classeur n'est pas rouvert à chaque réexécution
+        contenu = fichier.getvalue()
+        feuilles_disponibles = obtenir_cache_resultats().obtenir(
+            (empreinte_contenu(contenu, extension), "feuilles"), lambda: lister_feuilles(contenu, extension))
+        feuilles = st.multiselect("Feuilles à lire", feuilles_disponibles, default=feuilles_disponibles[:1])
+        colonnes = st.text_input("Colonnes à lire (ex. A:C,F ; vide pour toutes)").strip() or None
+        debut = st.number_input("Première ligne de données", min_value=0, step=1)
+        nombre = st.number_input("Nombre de lignes (0 pour toutes)", min_value=0, step=1)
+    lignes = (int(debut), int(nombre)) if debut or nombre else None
+    return {"feuilles": tuple(feuilles), "colonnes": colonnes, "lignes": lignes}
+
 # Fonction pour charger une base de données à partir d'un fichier
-def charger_base_de_donnees(fichier):
-    extension = fichier.name.split(".")[-1]
-    if extension.lower() in ["xlsx", "xls"]:
-        return pd.read_excel(fichier)
-    elif extension.lower() == "csv":
-        fichier.seek(0)  # Remettre le curseur au début du fichier
-        premiere_ligne = fichier.readline().decode().strip()  # Lire et décoder la première ligne
-        if premiere_ligne == "":
-            raise pd.errors.EmptyDataError("Fichier vide!")
-        delimiter = ","
-        if ";" in premiere_ligne:
-            delimiter = ";"
-        fichier.seek(0)  # Remettre le curseur au début du fichier
-        return pd.read_csv(fichier, delimiter=delimiter)
-    elif extension.lower() == "txt":
-        return pd.read_table(fichier, delimiter="\s+")
-    else:
-        raise ValueError("Format de fichier non pris en charge.")
+def charger_base_de_donnees(fichier, cache=None):
+    return charger_avec_empreinte(fichier, cache)[0]
+
+# Cache des résultats intermédiaires du pipeline de transformations
+@st.cache_resource
+def obtenir_cache_pipeline():
+    budget = int(os.environ.get("ANALYSE_PIPELINE_BUDGET_MO", BUDGET_PIPELINE_DEFAUT // (1024 * 1024))) * 1024 * 1024
+    return creer_cache_pipeline(budget)
+
 #fonction pour convertir le type des variables
 def convert_column_type(columns, new_types, data):
-    try:
-        for column, new_type in zip(columns, new_types):
-            if new_type == 'flottant':
-                data[column] = data[column].astype(float)
-            elif new_type == 'entier':
-                data[column] = data[column].astype(int)
-            elif new_type == 'double':
-                data[column] = data[column].astype(float)
-            elif new_type == 'chaine_caractère':
-                data[column] = data[column].astype(str)
-            elif new_type == 'date':
-                data[column] = pd.to_datetime(data[column])
-            elif new_type == 'booléen':
-                data[column] = data[column].astype(bool)
-    except ValueError:
-        st.error("Impossible de convertir la colonnes. Assurez-vous que toutes les valeurs sont dans des formats compatibles.")
+    data, rapport = convertir_colonnes(data, columns, new_types)
+    afficher_rapport_conversion(rapport)
     return data
-#Afficher les valeurs manquantes
-def plot_missing_values(data):
-    missing_values = data.isnull().sum()
-    missing_values = missing_values[missing_values > 0]
-    missing_values = missing_values.sort_values(ascending=False)
-
-    fig, ax = plt.subplots(figsize=(10, 6))
-    ax.bar(missing_values.index, missing_values.values)
-    ax.set_xticklabels(missing_values.index, rotation=45)
-    ax.set_xlabel('Colonnes')
-    ax.set_ylabel('Nombre de valeurs manquantes')
-    ax.set_title('Valeurs manquantes dans la base de données')
-    plt.tight_layout()
+
+# Fonction pour signaler les valeurs qui n'ont pas pu être converties
+def afficher_rapport_conversion(rapport):
+    if rapport is not None and not rapport.empty:
+        st.warning("Certaines valeurs n'ont pas pu être converties et ont été remplacées par des valeurs manquantes.")
+        st.write(rapport)
+
+# Fonction pour afficher la mémoire occupée par chaque colonne avant et après optimisation
+def afficher_rapport_memoire(rapport):
+    avant = rapport["Mémoire avant (octets)"].sum() / 1024 ** 2
+    apres = rapport["Mémoire après (octets)"].sum() / 1024 ** 2
+    with st.sidebar.expander(f"Mémoire : {avant:.1f} Mo → {apres:.1f} Mo"):
+        st.write(rapport)
+
+# Cache des résultats calculés à partir des données (agrégats, rapports, tris, filtres), partagé entre
+# les réexécutions du script
+@st.cache_resource
+def obtenir_cache_resultats():
+    return CacheResultats()
+
+# Fonction pour afficher une figure puis libérer sa mémoire
+def afficher_figure(fig):
     st.pyplot(fig)
-# Fonction pour effectuer le nettoyage des données (valeurs aberrantes)
-def nettoyer_donnees_aberrantes(data):
-    Q1 = data.quantile(0.25)
-    Q3 = data.quantile(0.75)
-    IQR = Q3 - Q1
-    outliers = ((data < (Q1 - 1.5 * IQR)) | (data > (Q3 + 1.5 * IQR))).any(axis=1)
-    data = data[~((data < (Q1 - 1.5 * IQR)) | (data > (Q3 + 1.5 * IQR))).any(axis=1)]
-    aberrant_data = data[outliers]
-    num_aberrant_values = aberrant_data.sum(axis=0)
-    st.write('Nombre de valeurs aberrantes après traitement:')
-    st.write(num_aberrant_values)
+    fig.clear()
+
+#Afficher les valeurs manquantes
+def plot_missing_values(data, cle=None):
+    cle = cle or empreinte_donnees(data)
+    missing_values = obtenir_cache_resultats().obtenir((cle, "valeurs_manquantes"), lambda: agregat_valeurs_manquantes(data))
+    afficher_figure(figure_valeurs_manquantes(missing_values))
+# Fonction pour repérer, prévisualiser puis supprimer les valeurs aberrantes
+def traiter_valeurs_aberrantes(data, pipeline, libelle_bouton):
+    st.subheader("Valeurs aberrantes")
+    methode = st.selectbox("Méthode de détection", list(METHODES_ABERRANTES), key="methode_aberrantes")
+    choix_groupe = st.selectbox("Calculer les seuils par groupe selon", ["Aucun"] + data.columns.tolist(), key="groupe_aberrantes")
+    groupe = None if choix_groupe == "Aucun" else choix_groupe
+    approximatif = len(data) > TAILLE_ECHANTILLON_QUANTILES
+    positions = obtenir_cache_resultats().obtenir(
+        (pipeline.cle, "aberrantes", methode, groupe),
+        lambda: detecter_aberrantes(data, methode, groupe=groupe, approximatif=approximatif))
+    st.write("Nombre de lignes contenant des valeurs aberrantes :", len(positions))
+    if len(positions):
+        st.write(data.iloc[positions[:NB_LIGNES_APERCU]])
+    if st.button(libelle_bouton):
+        # Les positions affichées sont reprises telles quelles ; elles restent hors des paramètres de
+        # l'étape, qui suffisent à l'identifier et à la rejouer
+        retrait = functools.partial(nettoyer_donnees_aberrantes, positions=positions)
+        data = pipeline.appliquer("nettoyer_donnees_aberrantes", retrait,
+                                  methode=methode, groupe=groupe, approximatif=approximatif).donnees
+        st.write("Nombre de lignes aberrantes supprimées :", len(positions))
+    return data
+
+# Fonction pour choisir puis appliquer le traitement des valeurs manquantes ; le rapport vient de l'étape
+# (mise en cache avec son résultat), sans recompter les valeurs manquantes de toute la base
+def traiter_valeurs_manquantes(data, pipeline):
+    methode = st.selectbox("Méthode de traitement", METHODES_IMPUTATION, key="methode_manquantes")
+    groupe = None
+    if methode != "Supprimer":
+        st.caption("Médiane et moyenne : colonnes numériques ; mode : colonnes catégorielles.")
+        choix_groupe = st.selectbox("Calculer par groupe selon", ["Aucun"] + data.columns.tolist(), key="groupe_manquantes")
+        groupe = None if choix_groupe == "Aucun" else choix_groupe
+    approximatif = len(data) > TAILLE_ECHANTILLON_QUANTILES
+    data = pipeline.appliquer("nettoyer_donnees_manquantes", nettoyer_donnees_manquantes, method=methode,
+                              groupe=groupe, approximatif=approximatif).donnees
+    rapport = pipeline.details
+    if rapport is not None:
+        if rapport["valeurs"] is not None:
+            st.write("Valeurs de remplacement :", rapport["valeurs"])
+        st.write("Nombre de valeurs manquantes après traitement :", rapport["manquants_apres"])
     return data
 
-# Fonction pour effectuer le nettoyage des données (valeurs manquantes)
-def nettoyer_donnees_manquantes(data, method):
-    if method == "Supprimer":
-        data = data.dropna()
-    elif method == "Remplir avec la médiane":
-        data = data.fillna(data.median())
-    elif method == "Remplir avec la moyenne":
-        data = data.fillna(data.mean())
+# Fonction pour afficher une base page par page : le tri et le filtre sont calculés côté serveur
+# et seules les lignes de la page courante sont envoyées au navigateur
+def afficher_tableau(data, cle, identifiant):
+    colonnes = st.columns(4)
+    taille = colonnes[0].selectbox("Lignes par page", TAILLES_PAGE, key=f"{identifiant}_taille")
+    colonne_tri = colonnes[1].selectbox("Trier selon", ["Aucun"] + data.columns.tolist(), key=f"{identifiant}_tri")
+    croissant = colonnes[2].radio("Ordre", ("Croissant", "Décroissant"), key=f"{identifiant}_ordre") == "Croissant"
+    with st.expander("Filtrer les lignes"):
+        colonne_filtre = st.selectbox("Colonne", ["Aucune"] + data.columns.tolist(), key=f"{identifiant}_filtre")
+        operateur = st.selectbox("Condition", OPERATEURS, key=f"{identifiant}_operateur")
+        valeur = st.text_input("Valeur", key=f"{identifiant}_valeur")
+
+    cache = obtenir_cache_resultats()
+    ordre = None
+    if colonne_tri != "Aucun":
+        ordre = cache.obtenir((cle, "tri", colonne_tri, croissant), lambda: ordre_tri(data, colonne_tri, croissant))
+    masque = None
+    if colonne_filtre != "Aucune" and (valeur or operateur == "est vide"):
+        try:
+            masque = cache.obtenir((cle, "filtre", colonne_filtre, operateur, valeur),
+                                   lambda: masque_condition(data, colonne_filtre, operateur, valeur))
+        except (ValueError, TypeError):
+            st.warning("Cette valeur ne peut pas être comparée à la colonne choisie.")
+    positions = positions_visibles(len(data), ordre, masque)
+
+    nb_pages = max(1, -(-len(positions) // taille))
+    # La clé dépend du nombre de pages : la page revient à 1 quand le filtre ou la taille changent
+    numero = colonnes[3].number_input("Page", min_value=1, max_value=nb_pages, value=1, step=1,
+                                      key=f"{identifiant}_page_{nb_pages}")
+    st.dataframe(extraire_page(data, positions, int(numero), taille))
+    debut = (int(numero) - 1) * taille
+    st.caption(f"Lignes {min(debut + 1, len(positions))} à {min(debut + taille, len(positions))} "
+               f"sur {len(positions)} ({len(data)} au total), page {int(numero)} sur {nb_pages}")
+
+# Fonction pour supprimer des lignes par plage de positions ou selon une condition
+def supprimer_lignes_choisies(data, pipeline, zone, identifiant):
+    zone.subheader("Éliminer des lignes")
+    debut = zone.number_input("Supprimer à partir de la ligne n°", min_value=0, max_value=len(data), value=0,
+                              step=1, key=f"{identifiant}_debut")
+    fin = zone.number_input("jusqu'à la ligne n° (exclue)", min_value=0, max_value=len(data), value=0,
+                            step=1, key=f"{identifiant}_fin")
+    data = pipeline.appliquer("supprimer_plage_lignes", supprimer_plage_lignes, debut=int(debut), fin=int(fin)).donnees
+
+    colonne = zone.selectbox("Supprimer les lignes dont la colonne", ["Aucune"] + data.columns.tolist(),
+                             key=f"{identifiant}_colonne")
+    operateur = zone.selectbox("vérifie la condition", OPERATEURS, key=f"{identifiant}_operateur")
+    valeur = zone.text_input("par rapport à la valeur", key=f"{identifiant}_valeur")
+    if colonne != "Aucune" and (valeur or operateur == "est vide"):
+        try:
+            data = pipeline.appliquer("supprimer_lignes_condition", supprimer_lignes_condition,
+                                      colonne=colonne, operateur=operateur, valeur=valeur).donnees
+        except (ValueError, TypeError):
+            zone.warning("Cette valeur ne peut pas être comparée à la colonne choisie.")
     return data
 
-# Fonction pour afficher les statistiques des données
-def afficher_statistiques(data):
-    st.write("Nombre de valeurs manquantes :", data.isnull().sum())
-    st.write("Moyenne :", data.mean())
-    st.write("Médiane :", data.median())
-    st.write("Nombre de lignes :", data.shape[0])
-    st.write("Nombre de variables :", data.shape[1])
-    st.write("nombre de doublons sur les lignes:",data.shape[0]-len(data.drop_duplicates()))
-    st.write("nombre de doublons sur les colonnes:",data.shape[1]-len(data.nunique()))
-    st.write("Plus de statistiques:",data.describe())
+# Fonction pour afficher les statistiques des données ; le rapport est gardé en cache selon l'empreinte
+# des données et n'est pas recalculé à chaque réexécution
+def afficher_statistiques(data, cle=None):
+    cle = cle or empreinte_donnees(data)
+    afficher_rapport(obtenir_cache_resultats().obtenir((cle, "statistiques"), lambda: calculer_statistiques(data)))
+
+# Fonction pour afficher un rapport de statistiques
+def afficher_rapport(rapport):
+    if rapport.approximatif:
+        st.caption("Les quantiles et le nombre de doublons sur les lignes sont des estimations.")
+    st.write("Nombre de valeurs manquantes :", rapport.valeurs_manquantes)
+    st.write("Moyenne :", rapport.moyenne)
+    st.write("Médiane :", rapport.mediane)
+    st.write("Nombre de lignes :", rapport.nb_lignes)
+    st.write("Nombre de variables :", rapport.nb_variables)
+    st.write("nombre de doublons sur les lignes:", rapport.doublons_lignes)
+    st.write("nombre de doublons sur les colonnes:", rapport.doublons_colonnes)
+    st.write("Plus de statistiques:", rapport.description)
     st.write("Plus d'informations:")
-    st.write(data.dtypes)
+    st.write(rapport.types)
+
+# Fonction pour calculer les statistiques d'un fichier CSV/TXT bloc par bloc ; le rapport est gardé
+# en cache selon l'empreinte du contenu, la lecture complète n'est pas refaite à chaque réexécution
+def calculer_statistiques_en_flux(fichier):
+    fichier.seek(0)
+    extension, options = detecter_format(fichier.name, fichier.read(TAILLE_ECHANTILLON))
+    if extension not in ["csv", "txt"]:
+        raise ValueError("Le mode flux ne prend en charge que les fichiers CSV et TXT.")
+    # Sans relecture possible, les types ne sont pas imposés : un bloc pourrait démentir l'échantillon
+    options.pop("dtype", None)
+    cle = empreinte_fichier(fichier, extension, sorted(options.items()))
+    return obtenir_cache_resultats().obtenir((cle, "statistiques_en_flux"),
+                                              lambda: statistiques_en_flux(fichier, **options))
+
+# Fonction pour obtenir le résumé (boîte à moustaches) d'une colonne, calculé une seule fois par version des données
+def resume_colonne(data, column, cle):
+    return obtenir_cache_resultats().obtenir((cle, "boite", column), lambda: resume_boite(data[column]))
 
 # Fonction pour afficher les boîtes à moustaches des colonnes
-def afficher_boites_a_moustaches(data):
+def afficher_boites_a_moustaches(data, cle=None):
     st.subheader("Boîtes à moustaches")
     selected_columns = st.multiselect("Sélectionner les variables", data.columns, key="boites_a_moustaches")
+    cle = cle or empreinte_donnees(data)
     
     if len(selected_columns) >= 2:
-        fig, ax = plt.subplots()
-        try:
-            data[selected_columns].boxplot()
-            st.pyplot(fig)
-        except Exception as e:
+        resumes = [resume_colonne(data, column, cle) for column in selected_columns if est_numerique(data[column])]
+        resumes = [resume for resume in resumes if resume is not None]
+        if resumes:
+            afficher_figure(figure_boites(resumes))
+        else:
             st.error("Au moins une variable doit être numérique")
     elif len(selected_columns) == 1:
         column = selected_columns[0]
-        if data[column].dtype != "object":
-            fig, ax = plt.subplots()
-            ax.boxplot(data[column].dropna())
-            ax.set_title(column)
-            st.pyplot(fig)
+        if est_numerique(data[column]):
+            resume = resume_colonne(data, column, cle)
+            if resume is not None:
+                afficher_figure(figure_boites([resume], titre=column))
         else:
             st.write("La variable sélectionnée ne contient pas de données numériques.")
     else:
         st.write("veuillez sélectionner au moins une variable numérique")
 
 # Fonction pour créer les tableaux de bord
-def creer_tableaux_de_bord(data):
+def creer_tableaux_de_bord(data, cle=None):
     st.subheader("Les graphiques")
     selected_columns = st.multiselect("Sélectionner les variables", data.columns, key="tableaux_de_bord")
+    cle = cle or empreinte_donnees(data)
     
     if len(selected_columns) > 0:
         for column in selected_columns:
             st.subheader(f"Diagrammes pour la variable {column}")
             chart_types = st.multiselect("Sélectionner les types de diagrammes", ("Circulaire", "Bâtons"), key=f"{column}_chart_types")
+            categorielle = not est_numerique(data[column]) and not pd.api.types.is_datetime64_any_dtype(data[column])
+            if chart_types and categorielle:
+                comptages = obtenir_cache_resultats().obtenir((cle, "comptages", column), lambda: comptages_principaux(data[column]))
             
             if "Circulaire" in chart_types:
                 st.markdown('<h1 style="color: green;">Diagramme circulaire</h1>', unsafe_allow_html=True)
-                if data[column].dtype == "object":
-                    fig, ax = plt.subplots()
-                    data[column].value_counts().plot(kind='pie', autopct='%1.1f%%', ax=ax)
-                    ax.set_aspect('equal')
-                    ax.set_title(column)
-                    st.pyplot(fig)
+                if categorielle:
+                    afficher_figure(figure_circulaire(comptages, column))
                 else:
                     st.write("La variable sélectionnée ne contient pas de données catégorielles.")
             
             if "Bâtons" in chart_types:
                 st.markdown('<h1 style="color: green;">Diagramme en bâtons</h1>', unsafe_allow_html=True)
-                if data[column].dtype == "object":
-                    fig, ax = plt.subplots()
-                    data[column].value_counts().plot(kind='bar', ax=ax)
-                    ax.set_title(column)
-                    st.pyplot(fig)
+                if categorielle:
+                    afficher_figure(figure_batons(comptages, column))
                 else:
                     st.write("La variable sélectionnée ne contient pas de données catégorielles.")
 
-def charger_base_de_donnees_en_ligne(url):
-    response = requests.get(url)
-    content = response.content.decode('utf-8')
-    return pd.read_csv(StringIO(content), delimiter=';', decimal=',', error_bad_lines=False)
+# Téléchargeur partagé entre les réexécutions : connexions réutilisées et cache disque
+@st.cache_resource
+def obtenir_chargeur_distant():
+    return ChargeurDistant()
+
+def charger_avec_empreinte_en_ligne(url, cache=None):
+    return obtenir_chargeur_distant().charger_csv(url, cache=cache, delimiter=';', decimal=',', on_bad_lines="skip")
+
+def charger_base_de_donnees_en_ligne(url, cache=None):
+    return charger_avec_empreinte_en_ligne(url, cache)[0]
 
 # Page d'accueil
-def page_accueil():
+def page_accueil(instrumentation=None):
+    instrumentation = instrumentation or Instrumentation(actif=False)
     st.title("Automatisez vos tâches fastidueuses du process data")
     st.markdown('<h2 style="color: blue;">Bienvenue ! Veuillez sélectionner une base de données à analyser.</h2>', unsafe_allow_html=True)
 
@@ -165,13 +310,26 @@ def page_accueil():
     if option == "Charger une base de données locale":
         fichier = st.file_uploader("Sélectionner un fichier(tabulaire)", type=["xlsx", "xls", "csv", "txt"])
         
+        if fichier is not None and st.sidebar.checkbox("Mode flux (fichiers volumineux)"):
+            try:
+                with instrumentation.mesurer("statistiques en flux"):
+                    rapport = calculer_statistiques_en_flux(fichier)
+                st.markdown('<h2 style="color: green;">Les statistiques de la base de données (mode flux)</h2>', unsafe_allow_html=True)
+                afficher_rapport(rapport)
+                st.info("En mode flux, la base n'est pas chargée en mémoire : les transformations sont désactivées.")
+            except Exception as e:
+                st.error("Le mode flux nécessite un fichier CSV ou TXT.")
+            return None
+
         if fichier is not None:
             try:
-                data = charger_base_de_donnees(fichier)
+                with instrumentation.mesurer("chargement") as mesure:
+                    data, cle_source = charger_avec_empreinte(fichier, cache=obtenir_cache_donnees(), **choisir_options_excel(fichier))
+                    mesure["lignes"] = len(data)
                 
                 # Affichage de la base de données initiale
                 st.subheader("Base de données initiale")
-                st.write(data)
+                afficher_tableau(data, cle_source, "initiale")
                 st.markdown('<h2 style="color: blue;">les premières lignes de la base de données:</h2>', unsafe_allow_html=True)
                 st.write(data.head())
                 st.markdown('<h2 style="color: blue;">les dernières lignes de la base de données:</h2>', unsafe_allow_html=True)
@@ -182,30 +340,27 @@ def page_accueil():
             # Supprimer des colonnes
             try:
                 st.markdown('<h2 style="color: green;">Les statistiques de la base de données initiale</h2>', unsafe_allow_html=True)
-                afficher_statistiques(data)
+                with instrumentation.mesurer("statistiques initiales", data):
+                    afficher_statistiques(data, cle_source)
+                pipeline = PipelineTransformations(data, obtenir_cache_pipeline(), cle_source=cle_source,
+                                                   instrumentation=instrumentation)
+                # Optimisation de la mémoire juste après le chargement
+                if st.sidebar.checkbox("Optimiser la mémoire"):
+                    data = pipeline.appliquer("optimiser_memoire", optimiser_memoire).donnees
+                    afficher_rapport_memoire(pipeline.details)
                 # Supprimer des colonnes
                 st.sidebar.subheader("Supprimer des colonnes")
                 selected_columns = st.sidebar.multiselect("Sélectionner les variables à supprimer", data.columns)
-                data = data.drop(columns=selected_columns)
+                data = pipeline.appliquer("supprimer_colonnes", supprimer_colonnes, colonnes=tuple(selected_columns)).donnees
     
-                # Suppression de lignes sélectionnées
-                st.sidebar.subheader("Éliminer des lignes sélectionnées")
-                selected_rows = st.sidebar.multiselect("Sélectionner les lignes à éliminer", data.index)
-                data = data.drop(index=selected_rows)
+                # Suppression de lignes par plage ou selon une condition
+                data = supprimer_lignes_choisies(data, pipeline, st.sidebar, "suppression")
     
                 # Suppression d'un nombre précis de lignes
                 st.sidebar.subheader("Éliminer un nombre précis de lignes")
                 delete_option = st.sidebar.selectbox("Sélectionner l'option de suppression", ["Au début", "À la fin", "Au milieu"])
                 num_rows = st.sidebar.number_input("Nombre de lignes à supprimer", min_value=0, max_value=len(data), step=1)
-    
-                if delete_option == "Au début":
-                    data = data.iloc[num_rows:]
-                elif delete_option == "À la fin":
-                    data = data.iloc[:-num_rows]
-                elif delete_option == "Au milieu":
-                    start_index = len(data) // 2 - num_rows // 2
-                    end_index = start_index + num_rows
-                    data = data.drop(index=data.index[start_index:end_index])
+                data = pipeline.appliquer("tronquer_lignes", tronquer_lignes, option=delete_option, nombre=int(num_rows)).donnees
                 #convertir les types des colonnes
                 st.sidebar.subheader("Transformer les types des colonnes:")
                 st.sidebar.markdown('<span style="color: red;">Assurez-vous que les valeurs de la colonnes correspondent bien au type choisi</span>', unsafe_allow_html=True)
@@ -214,18 +369,20 @@ def page_accueil():
                 # Sélectionner les nouveaux types pour chaque colonne
                 new_types = []
                 for column in selected_columns:
-                    new_type = st.sidebar.selectbox(f"Sélectionner le nouveau type pour la colonne {column}", ["flottant", "entier", "double", "chaine_caractère", "date", "booléen"], key=f"select_type_{column}")
+                    new_type = st.sidebar.selectbox(f"Sélectionner le nouveau type pour la colonne {column}", list(TYPES_DISPONIBLES), key=f"select_type_{column}")
                     new_types.append(new_type)
         
                 # Convertir les colonnes
-                data = convert_column_type(selected_columns, new_types, data)                
+                data = pipeline.appliquer("convertir_types", convertir_types, colonnes=tuple(selected_columns), types=tuple(new_types)).donnees
+                afficher_rapport_conversion(pipeline.details)
                 # Affichage des statistiques transformées
                 st.markdown('<h2 style="color: green;">Les statistiques de la base de données transformée</h2>', unsafe_allow_html=True)
-                afficher_statistiques(data)
+                with instrumentation.mesurer("statistiques transformées", data):
+                    afficher_statistiques(data, pipeline.cle)
             
                 # Nettoyage des données aberrantes
-                if st.button("Supprimer les valeurs aberrantes"):
-                    data = nettoyer_donnees_aberrantes(data)
+                with instrumentation.mesurer("valeurs aberrantes", data):
+                    data = traiter_valeurs_aberrantes(data, pipeline, "Supprimer les valeurs aberrantes")
                     
             except Exception as e:
                 st.error("Un problème est survenu lors de la réalisation de cette opération.")
@@ -233,28 +390,23 @@ def page_accueil():
             st.markdown('<h2 style="color: blue;">traitement des valeurs manquantes</h2>', unsafe_allow_html=True)
             try:
                 st.subheader("Graphique des valeurs manquantes")
-                plot_missing_values(data)
-                nettoyage_method = st.selectbox("Méthode de traitement", ("Supprimer", "Remplir avec la médiane", "Remplir avec la moyenne"))
-                if nettoyage_method != "Supprimer":
-                    data = nettoyer_donnees_manquantes(data, nettoyage_method)
-                    st.write("Nombre de valeurs manquantes après traitement:", data.isnull().sum())
-                else:
-                    data = nettoyer_donnees_manquantes(data, nettoyage_method)
-                    st.write("Nombre de valeurs manquantes après traitement :", data.isnull().sum())
+                with instrumentation.mesurer("graphique des valeurs manquantes", data):
+                    plot_missing_values(data, cle=pipeline.cle)
+                data = traiter_valeurs_manquantes(data, pipeline)
             except Exception as e:
                 st.error("Veuillez vous assurer que la structure de votre bd est la bonne!")
             # Affichage de la base de données résultante
 
             try:
                 st.markdown('<h2 style="color: blue;">Base de données résultante</h2>', unsafe_allow_html=True)
-                st.write(data)
+                afficher_tableau(data, pipeline.cle, "resultante")
                 #renommer des colonnes
                 st.sidebar.subheader("Renommer les noms des colonnes")
                 st.sidebar.markdown('<span style="color: red;">Attention!, assurez-vous que cela ne causera pas de problème d\'intégrité!</span>', unsafe_allow_html=True)
                 colonnes_a_modifier = st.sidebar.multiselect("Sélectionnez les colonnes à renommer", data.columns.tolist())
     
-                # Création d'une liste pour stocker les nouveaux noms de colonnes
-                noms_colonnes_modifies = data.columns.tolist()
+                # Création d'un dictionnaire {ancien nom: nouveau nom}, limité aux colonnes effectivement renommées
+                noms_colonnes_modifies = {}
     
                 # Création d'un dictionnaire pour stocker les éléments interactifs (input) associés aux colonnes
                 input_elements = {}
@@ -265,47 +417,28 @@ def page_accueil():
                         input_elements[colonne] = st.empty()
                         input_value = input_elements[colonne].text_input(colonne, value=colonne, key=colonne)
                         
-                        # Mise à jour du nouveau nom de colonne dans la liste
-                        noms_colonnes_modifies[data.columns.get_loc(colonne)] = input_value
+                        # Mise à jour du nouveau nom de colonne dans le dictionnaire
+                        if input_value != colonne:
+                            noms_colonnes_modifies[colonne] = input_value
     
-                # Renommer les colonnes avec les nouveaux noms
-                data.columns = noms_colonnes_modifies
+                # Renommer les colonnes avec les nouveaux noms (étape absente du pipeline si rien n'est renommé)
+                if noms_colonnes_modifies:
+                    data = pipeline.appliquer("renommer_colonnes", renommer_colonnes, noms=noms_colonnes_modifies).donnees
+                with st.sidebar.expander("Durée des étapes"):
+                    st.write(pipeline.tableau_durees())
     
                 # Bouton pour déclencher la modification
                 if st.sidebar.button("Renommer les colonnes"):
                     st.markdown('<h2 style="color: green;">Base de données avec colonnes renommées</h2>', unsafe_allow_html=True)
-                    st.write(data)
+                    # Seuls les noms changent : un aperçu suffit, sans recharger toute la base dans le navigateur
+                    st.dataframe(data.head(NB_LIGNES_APERCU))
                     # Téléchargement de la base de données résultante
-                download_format = st.sidebar.selectbox("Sélectionner le format de téléchargement", ["CSV", "XLSX", "XLS", "TXT"])
+                download_format = st.sidebar.selectbox("Sélectionner le format de téléchargement", list(FORMATS_EXPORT))
                 if st.sidebar.button("Télécharger la base de données"):
-                    if download_format == "CSV":
-                        csv_data = data_editable.to_csv(index=False)
-                        file_extension = "csv"
-                    elif download_format == "XLSX":
-                        excel_data = io.BytesIO()
-                        with pd.ExcelWriter(excel_data, engine="xlsxwriter") as writer:
-                            data_editable.to_excel(writer, index=False)
-                        excel_data.seek(0)
-                        file_extension = "xlsx"
-                    elif download_format == "XLS":
-                        excel_data = io.BytesIO()
-                        with pd.ExcelWriter(excel_data, engine="openpyxl") as writer:
-                            data_editable.to_excel(writer, index=False)
-                        excel_data.seek(0)
-                        file_extension = "xls"
-                    elif download_format == "TXT":
-                        csv_data = data_editable.to_csv(index=False, sep="\t")
-                        file_extension = "txt"
-    
-                    if download_format in ["CSV", "TXT"]:
-                        b64 = base64.b64encode(csv_data.encode()).decode()
-                    else:
-                        b64 = base64.b64encode(excel_data.read()).decode()
-                        excel_data.close()
-    
-                    href = f'<a href="data:file/{file_extension};base64,{b64}" download="resultat.{file_extension}">Obtenir</a>'
-                    st.sidebar.markdown(href, unsafe_allow_html=True)
-                    data=data_editable
+                    with instrumentation.mesurer("export", data):
+                        proposer_telechargement(data, download_format, cle=pipeline.cle)
+                proposer_specification(pipeline)
+                st.session_state["empreinte_donnees"] = pipeline.cle
                 return data
             except Exception as e:
                 st.error("Merci de recharger une base de données tabulaire! ")   
@@ -315,9 +448,11 @@ def page_accueil():
             # Charger la base de données en ligne (exemple avec base Commerciale)
             url = "https://raw.githubusercontent.com/robertmessan/lunettes_parlantes/main/data_bd.csv"  # Utilisez une base de données de votre choix
             try:
-                data = charger_base_de_donnees_en_ligne(url)
+                with instrumentation.mesurer("chargement") as mesure:
+                    data, cle_source = charger_avec_empreinte_en_ligne(url, cache=obtenir_cache_donnees())
+                    mesure["lignes"] = len(data)
                 st.subheader("Base de données initiale :")
-                st.write(data)
+                afficher_tableau(data, cle_source, "initiale_en_ligne")
                 st.markdown('<h1 style="color: blue;">les premières lignes de la base de données:</h1>', unsafe_allow_html=True)
                 st.write(data.head())
                 st.markdown('<h1 style="color: blue;">les dernières lignes de la base de données:</h1>', unsafe_allow_html=True)
@@ -333,69 +468,94 @@ def page_accueil():
             
             # Supprimer des colonnes
             st.markdown('<h2 style="color: green;">Les statistiques de la base de données initiale</h2>', unsafe_allow_html=True)
-            afficher_statistiques(data)
+            with instrumentation.mesurer("statistiques initiales", data):
+                afficher_statistiques(data, cle_source)
+            pipeline = PipelineTransformations(data, obtenir_cache_pipeline(), cle_source=cle_source,
+                                               instrumentation=instrumentation)
             # Supprimer des colonnes
             st.subheader("Supprimer des colonnes")
             selected_columns = st.multiselect("Sélectionner les variables à supprimer", data.columns)
-            data = data.drop(columns=selected_columns)
+            data = pipeline.appliquer("supprimer_colonnes", supprimer_colonnes, colonnes=tuple(selected_columns)).donnees
 
-            # Suppression de lignes sélectionnées
-            st.subheader("Éliminer des lignes sélectionnées")
-            selected_rows = st.multiselect("Sélectionner les lignes à éliminer", data.index)
-            data = data.drop(index=selected_rows)
+            # Suppression de lignes par plage ou selon une condition
+            data = supprimer_lignes_choisies(data, pipeline, st, "suppression_en_ligne")
 
             # Suppression d'un nombre précis de lignes
             st.subheader("Éliminer un nombre précis de lignes")
             delete_option = st.selectbox("Sélectionner l'option de suppression", ["Au début", "À la fin", "Au milieu"])
             num_rows = st.number_input("Nombre de lignes à supprimer", min_value=0, max_value=len(data), step=1)
-
-            if delete_option == "Au début":
-                data = data.iloc[num_rows:]
-            elif delete_option == "À la fin":
-                data = data.iloc[:-num_rows]
-            elif delete_option == "Au milieu":
-                start_index = len(data) // 2 - num_rows // 2
-                end_index = start_index + num_rows
-                data = data.drop(index=data.index[start_index:end_index])
+            data = pipeline.appliquer("tronquer_lignes", tronquer_lignes, option=delete_option, nombre=int(num_rows)).donnees
             
             # Affichage des statistiques initiales
             st.markdown('<h2 style="color: green;">Les statistiques de la base de données transformée</h2>', unsafe_allow_html=True)
-            afficher_statistiques(data)
+            with instrumentation.mesurer("statistiques transformées", data):
+                afficher_statistiques(data, pipeline.cle)
             
             # Nettoyage des données aberrantes
-            if st.button("Supprimer les données aberrantes"):
-                data = nettoyer_donnees_aberrantes(data)
-                st.write("Nombre de données aberrantes après traitement :", data.isnull().sum())
+            with instrumentation.mesurer("valeurs aberrantes", data):
+                data = traiter_valeurs_aberrantes(data, pipeline, "Supprimer les données aberrantes")
             
             # Nettoyage des valeurs manquantes
             st.markdown('<h2 style="color: blue;">traitement des valeurs manquantes</h2>', unsafe_allow_html=True)
             st.subheader("Graphique des valeurs manquantes")
-            plot_missing_values(data)
-            nettoyage_method = st.selectbox("Méthode de traitement", ("Supprimer", "Remplir avec la médiane", "Remplir avec la moyenne"))
-            if nettoyage_method != "Supprimer":
-                data = nettoyer_donnees_manquantes(data, nettoyage_method)
-                st.write("Nombre de valeurs manquantes :", data.isnull().sum())
-            else:
-                st.write("Nombre de valeurs manquantes :", data.isnull().sum())
+            with instrumentation.mesurer("graphique des valeurs manquantes", data):
+                plot_missing_values(data, cle=pipeline.cle)
+            data = traiter_valeurs_manquantes(data, pipeline)
             st.markdown('<h2 style="color: blue;">Base de données résultante</h2>', unsafe_allow_html=True)
-            st.write(data)
+            afficher_tableau(data, pipeline.cle, "resultante_en_ligne")
+            with st.sidebar.expander("Durée des étapes"):
+                st.write(pipeline.tableau_durees())
+            proposer_specification(pipeline)
+            st.session_state["empreinte_donnees"] = pipeline.cle
             
             return data
 
+# Fonction pour proposer le téléchargement d'une base, écrite au préalable dans un fichier temporaire
+def proposer_telechargement(data, format_export, cle=None):
+    extension, type_mime = FORMATS_EXPORT[format_export]
+    chemin = exporter_vers_fichier_temporaire(data, format_export, cle=cle)
+    with open(chemin, "rb") as fichier_export:
+        st.sidebar.download_button("Obtenir", fichier_export, file_name=f"resultat.{extension}", mime=type_mime)
+
+# Fonction pour enregistrer les étapes appliquées, rejouables sur d'autres fichiers avec traitement_lot.py
+def proposer_specification(pipeline):
+    specification = json.dumps(pipeline.specification(), ensure_ascii=False, indent=2,
+                               default=lambda valeur: valeur.item() if hasattr(valeur, "item") else str(valeur))
+    st.sidebar.download_button("Enregistrer le pipeline", specification, file_name="pipeline.json", mime="application/json")
+
+# Fonction pour afficher les mesures de chaque étape dans la barre latérale et proposer leur export en JSON
+def afficher_instrumentation(instrumentation):
+    if not instrumentation.actif:
+        return
+    with st.sidebar.expander("Mesures de performance", expanded=True):
+        st.write(instrumentation.tableau())
+        st.download_button("Exporter les mesures (JSON)", instrumentation.vers_json(), file_name="mesures.json",
+                           mime="application/json")
+
 # Main
 def main():
     # Configuration de la mise en page de Streamlit
     st.set_page_config(page_title="Automatisez vos tâches fastidueuses", layout="wide")
     
+    # Mode débogage : durée et lignes traitées de chaque étape. Le pic de mémoire (tracemalloc) est mesuré
+    # pour tout le processus, donc pour toutes les sessions à la fois : il n'est suivi que sur demande
+    debogage = st.sidebar.checkbox("Mode débogage (mesures de performance)")
+    suivre_memoire = debogage and st.sidebar.checkbox("Mesurer le pic de mémoire (ralentit toutes les sessions)")
+    instrumentation = Instrumentation(actif=debogage, suivre_memoire=suivre_memoire)
+
     # Page d'accueil
-    data = page_accueil()
+    data = page_accueil(instrumentation)
     
     if data is not None:
+        cle = st.session_state.get("empreinte_donnees")
         # Affichage des boîtes à moustaches
-        afficher_boites_a_moustaches(data)
+        with instrumentation.mesurer("boîtes à moustaches", data):
+            afficher_boites_a_moustaches(data, cle=cle)
         
         # Création des tableaux de bord
-        creer_tableaux_de_bord(data)
+        with instrumentation.mesurer("tableaux de bord", data):
+            creer_tableaux_de_bord(data, cle=cle)
+    afficher_instrumentation(instrumentation)
 
 if __name__ == "__main__":
     main()
@@ -0,0 +1,101 @@
+import os
+import tempfile
+
+import xlsxwriter
+
+from cache_donnees import nettoyer_repertoire
+
+# Format proposé -> (extension, type MIME)
+FORMATS_EXPORT = {
+    "CSV": ("csv", "text/csv"),
+    "XLSX": ("xlsx", "application/vnd.openxmlformats-officedocument.spreadsheetml.sheet"),
+    "TXT": ("txt", "text/plain"),
+    "Parquet": ("parquet", "application/octet-stream"),
+    "Feather": ("feather", "application/octet-stream"),
+}
+
+# Nombre de lignes écrites à la fois
+TAILLE_BLOC_EXPORT = 50_000
+# Limites d'une feuille Excel (ligne d'en-tête comprise)
+NB_LIGNES_MAX_EXCEL = 1_048_576
+NB_COLONNES_MAX_EXCEL = 16_384
+
+REPERTOIRE_EXPORTS = os.path.join(tempfile.gettempdir(), "analyse_exports")
+# Les exports non réutilisés depuis cette durée (en secondes) sont supprimés
+DUREE_CONSERVATION_EXPORTS = 3600
+# Au-delà de cette taille totale (en octets), les exports les moins récemment utilisés sont supprimés
+TAILLE_MAX_EXPORTS = 2 * 1024 * 1024 * 1024
+
+
+# Fonction pour écrire une base dans un classeur Excel ligne par ligne (mode mémoire constante de xlsxwriter)
+def ecrire_excel(data, chemin, taille_bloc=TAILLE_BLOC_EXPORT):
+    # En mode mémoire constante, xlsxwriter ignore sans erreur les lignes au-delà de la limite
+    if len(data) + 1 > NB_LIGNES_MAX_EXCEL or len(data.columns) > NB_COLONNES_MAX_EXCEL:
+        raise ValueError(f"Une feuille Excel est limitée à {NB_LIGNES_MAX_EXCEL - 1} lignes et "
+                         f"{NB_COLONNES_MAX_EXCEL} colonnes ; la base compte {len(data)} lignes et "
+                         f"{len(data.columns)} colonnes. Choisissez le format CSV, Parquet ou Feather.")
+    options = {"constant_memory": True, "nan_inf_to_errors": True,
+               "default_date_format": "yyyy-mm-dd hh:mm:ss", "remove_timezone": True}
+    with xlsxwriter.Workbook(chemin, options) as classeur:
+        feuille = classeur.add_worksheet()
+        feuille.write_row(0, 0, [str(colonne) for colonne in data.columns])
+        ligne = 1
+        for debut in range(0, len(data), taille_bloc):
+            bloc = data.iloc[debut:debut + taille_bloc]
+            valeurs = bloc.to_numpy(dtype=object)
+            valeurs[bloc.isna().to_numpy()] = None
+            # En mode mémoire constante les lignes doivent être écrites dans l'ordre, une à une
+            for valeurs_ligne in valeurs:
+                feuille.write_row(ligne, 0, valeurs_ligne)
+                ligne += 1
+
+
+# Fonction pour écrire une base dans un fichier, au format choisi
+def exporter(data, format_export, chemin, taille_bloc=TAILLE_BLOC_EXPORT):
+    if format_export == "CSV":
+        data.to_csv(chemin, index=False, chunksize=taille_bloc)
+    elif format_export == "TXT":
+        data.to_csv(chemin, index=False, sep="\t", chunksize=taille_bloc)
+    elif format_export == "XLSX":
+        ecrire_excel(data, chemin, taille_bloc)
+    elif format_export == "Parquet":
+        data.rename(columns=str).to_parquet(chemin, index=False)
+    elif format_export == "Feather":
+        data.rename(columns=str).reset_index(drop=True).to_feather(chemin)
+    else:
+        raise ValueError("Format de téléchargement non pris en charge.")
+    return chemin
+
+
+# Fonction pour supprimer les exports trop anciens, puis les moins récemment utilisés tant que
+# le répertoire dépasse la taille maximale
+def nettoyer_exports(repertoire=REPERTOIRE_EXPORTS, duree_max=DUREE_CONSERVATION_EXPORTS,
+                     taille_max=TAILLE_MAX_EXPORTS):
+    nettoyer_repertoire(repertoire, duree_max, taille_max, ".partiel")
+
+
+# Fonction pour exporter une base dans un fichier temporaire, réutilisé tant que la base ne change pas
+def exporter_vers_fichier_temporaire(data, format_export, cle=None):
+    extension, _ = FORMATS_EXPORT[format_export]
+    os.makedirs(REPERTOIRE_EXPORTS, exist_ok=True)
+    nettoyer_exports()
+    if cle is not None:
+        chemin = os.path.join(REPERTOIRE_EXPORTS, f"{cle}.{extension}")
+        if os.path.exists(chemin):
+            # La date de modification sert de date de dernière utilisation
+            os.utime(chemin)
+            return chemin
+    else:
+        descripteur, chemin = tempfile.mkstemp(suffix=f".{extension}", dir=REPERTOIRE_EXPORTS)
+        os.close(descripteur)
+    # Fichier d'écriture propre à cet appel : deux sessions qui exportent la même base n'écrivent pas
+    # dans le même fichier, et seul un fichier complet est renommé
+    descripteur, temporaire = tempfile.mkstemp(suffix=f".{extension}.partiel", dir=REPERTOIRE_EXPORTS)
+    os.close(descripteur)
+    try:
+        exporter(data, format_export, temporaire)
+        os.replace(temporaire, chemin)
+    finally:
+        if os.path.exists(temporaire):
+            os.remove(temporaire)
+    return chemin
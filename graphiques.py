@@ -0,0 +1,93 @@
+import numpy as np
+import pandas as pd
+from matplotlib.figure import Figure
+
+# Nombre maximal de valeurs aberrantes dessinées sur une boîte à moustaches
+TAILLE_ECHANTILLON_ABERRANTS = 1000
+# Nombre de modalités affichées sur un diagramme, les autres étant regroupées
+NB_MODALITES = 10
+LIBELLE_AUTRES = "Autres"
+
+
+# Fonction pour compter les valeurs manquantes des colonnes qui en ont
+def agregat_valeurs_manquantes(data):
+    valeurs_manquantes = data.isnull().sum()
+    valeurs_manquantes = valeurs_manquantes[valeurs_manquantes > 0]
+    return valeurs_manquantes.sort_values(ascending=False)
+
+
+# Fonction pour résumer une colonne numérique en boîte à moustaches (format attendu par Axes.bxp)
+def resume_boite(serie, taille_echantillon=TAILLE_ECHANTILLON_ABERRANTS):
+    valeurs = serie.to_numpy(dtype=float, na_value=np.nan)
+    valeurs = valeurs[~np.isnan(valeurs)]
+    if len(valeurs) == 0:
+        return None
+    q1, mediane, q3 = np.percentile(valeurs, [25, 50, 75])
+    ecart = q3 - q1
+    dans_moustaches = valeurs[(valeurs >= q1 - 1.5 * ecart) & (valeurs <= q3 + 1.5 * ecart)]
+    aberrants = valeurs[(valeurs < q1 - 1.5 * ecart) | (valeurs > q3 + 1.5 * ecart)]
+    if len(aberrants) > taille_echantillon:
+        # Les extrêmes sont toujours gardés pour que l'échelle du graphique reste juste
+        echantillon = np.random.default_rng(0).choice(aberrants, taille_echantillon - 2, replace=False)
+        aberrants = np.concatenate([[aberrants.min(), aberrants.max()], echantillon])
+    return {
+        "label": str(serie.name),
+        "med": mediane,
+        "q1": q1,
+        "q3": q3,
+        "whislo": dans_moustaches.min(),
+        "whishi": dans_moustaches.max(),
+        "fliers": aberrants,
+        "mean": valeurs.mean(),
+    }
+
+
+# Fonction pour compter les modalités les plus fréquentes, les autres étant regroupées
+def comptages_principaux(serie, nb_modalites=NB_MODALITES):
+    comptages = serie.value_counts()
+    if len(comptages) <= nb_modalites:
+        return comptages
+    principaux = comptages.iloc[:nb_modalites]
+    autres = pd.Series([comptages.iloc[nb_modalites:].sum()], index=[LIBELLE_AUTRES])
+    return pd.concat([principaux, autres])
+
+
+# Les figures sont créées hors de pyplot : elles ne s'accumulent pas d'une réexécution à l'autre
+def figure_valeurs_manquantes(valeurs_manquantes):
+    fig = Figure(figsize=(10, 6))
+    ax = fig.subplots()
+    ax.bar(valeurs_manquantes.index.astype(str), valeurs_manquantes.values)
+    ax.tick_params(axis="x", labelrotation=45)
+    ax.set_xlabel('Colonnes')
+    ax.set_ylabel('Nombre de valeurs manquantes')
+    ax.set_title('Valeurs manquantes dans la base de données')
+    fig.tight_layout()
+    return fig
+
+
+def figure_boites(resumes, titre=None):
+    fig = Figure()
+    ax = fig.subplots()
+    ax.bxp(resumes)
+    if titre is not None:
+        ax.set_title(titre)
+    return fig
+
+
+def figure_circulaire(comptages, titre):
+    fig = Figure()
+    ax = fig.subplots()
+    ax.pie(comptages.values, labels=comptages.index.astype(str), autopct='%1.1f%%')
+    ax.set_aspect('equal')
+    ax.set_title(titre)
+    return fig
+
+
+def figure_batons(comptages, titre):
+    fig = Figure()
+    ax = fig.subplots()
+    ax.bar(comptages.index.astype(str), comptages.values)
+    ax.tick_params(axis="x", labelrotation=90)
+    ax.set_title(titre)
+    fig.tight_layout()
+    return fig
@@ -0,0 +1,68 @@
+import json
+import time
+import tracemalloc
+from contextlib import contextmanager
+
+import pandas as pd
+
+
+# Relevé, pour chaque étape du traitement, de la durée, du pic de mémoire et du nombre de lignes traitées.
+# Inactif, il ne mesure rien : les étapes s'exécutent sans surcoût. Le suivi de la mémoire (tracemalloc)
+# ralentit les allocations : sans lui, les durées sont plus fidèles. tracemalloc est global au processus :
+# les allocations des autres fils d'exécution sont comptées, et deux relevés simultanés se remettent
+# à zéro l'un l'autre. Le pic n'est fiable que dans un processus seul, comme le banc d'essai
+class Instrumentation:
+    def __init__(self, actif=True, suivre_memoire=True):
+        self.actif = actif
+        self.suivre_memoire = suivre_memoire
+        self.mesures = []
+        self._pile = []
+        self._suivi_demarre = False
+
+    # Mesure le bloc ; le nombre de lignes vient de la base fournie ou peut être renseigné dans le bloc
+    @contextmanager
+    def mesurer(self, etape, data=None):
+        mesure = {"etape": etape, "lignes": len(data) if data is not None else None}
+        if not self.actif:
+            yield mesure
+            return
+        if not self.suivre_memoire:
+            debut = time.perf_counter()
+            try:
+                yield mesure
+            finally:
+                mesure["duree"] = round(time.perf_counter() - debut, 6)
+                mesure["pic_memoire_mo"] = None
+                mesure["niveau"] = len(self._pile)
+                self.mesures.append(mesure)
+            return
+        if not self._pile and not tracemalloc.is_tracing():
+            tracemalloc.start()
+            self._suivi_demarre = True
+        if self._pile:
+            # Le pic de l'étape englobante est conservé avant sa remise à zéro
+            self._pile[-1]["pic"] = max(self._pile[-1]["pic"], tracemalloc.get_traced_memory()[1])
+        tracemalloc.reset_peak()
+        depart = tracemalloc.get_traced_memory()[0]
+        self._pile.append({"pic": 0})
+        debut = time.perf_counter()
+        try:
+            yield mesure
+        finally:
+            duree = time.perf_counter() - debut
+            pic = max(tracemalloc.get_traced_memory()[1], self._pile.pop()["pic"])
+            if self._pile:
+                self._pile[-1]["pic"] = max(self._pile[-1]["pic"], pic)
+            elif self._suivi_demarre:
+                tracemalloc.stop()
+                self._suivi_demarre = False
+            mesure["duree"] = round(duree, 6)
+            mesure["pic_memoire_mo"] = round(max(pic - depart, 0) / (1024 * 1024), 3)
+            mesure["niveau"] = len(self._pile)
+            self.mesures.append(mesure)
+
+    def tableau(self):
+        return pd.DataFrame(self.mesures, columns=["etape", "duree", "pic_memoire_mo", "lignes", "niveau"])
+
+    def vers_json(self):
+        return json.dumps(self.mesures, ensure_ascii=False, indent=2)
@@ -0,0 +1,71 @@
+import numpy as np
+import pandas as pd
+
+try:
+    import pyarrow  # noqa: F401
+    TYPE_CHAINE = "string[pyarrow]"
+except ImportError:
+    TYPE_CHAINE = None
+
+# Une colonne de texte devient catégorielle si elle a moins de valeurs distinctes que cette part des lignes
+SEUIL_CARDINALITE = 0.5
+
+
+# Fonction pour réduire un entier au plus petit type signé qui contient toutes ses valeurs
+def reduire_entiers(serie):
+    if serie.empty:
+        return serie
+    return pd.to_numeric(serie, downcast="integer")
+
+
+# Un flottant n'est réduit en float32 que si toutes ses valeurs sont conservées à l'identique
+def reduire_flottants(serie):
+    valeurs = serie.to_numpy()
+    reduites = valeurs.astype(np.float32)
+    if np.array_equal(reduites.astype(valeurs.dtype), valeurs, equal_nan=True):
+        return pd.Series(reduites, index=serie.index, name=serie.name)
+    return serie
+
+
+# Fonction pour choisir un type plus compact pour une colonne de texte
+def reduire_texte(serie, seuil_cardinalite=SEUIL_CARDINALITE):
+    if pd.api.types.infer_dtype(serie, skipna=True) not in ("string", "empty"):
+        return serie
+    nb_valeurs = serie.count()
+    if nb_valeurs and serie.nunique() < seuil_cardinalite * nb_valeurs:
+        return serie.astype("category")
+    if TYPE_CHAINE is not None:
+        return serie.astype(TYPE_CHAINE)
+    return serie
+
+
+# Fonction pour réduire l'empreinte mémoire d'une base ; rend aussi la taille de chaque colonne avant et après
+def optimiser_memoire(data, seuil_cardinalite=SEUIL_CARDINALITE):
+    avant = data.memory_usage(index=False, deep=True)
+    types_avant = data.dtypes
+    colonnes = {}
+    for i, colonne in enumerate(data.columns):
+        serie = data.iloc[:, i]
+        if pd.api.types.is_bool_dtype(serie):
+            colonnes[i] = serie
+        elif pd.api.types.is_integer_dtype(serie) and not pd.api.types.is_extension_array_dtype(serie):
+            colonnes[i] = reduire_entiers(serie)
+        elif pd.api.types.is_float_dtype(serie) and serie.dtype == np.float64:
+            colonnes[i] = reduire_flottants(serie)
+        elif serie.dtype == object:
+            colonnes[i] = reduire_texte(serie, seuil_cardinalite)
+        else:
+            colonnes[i] = serie
+    if colonnes:
+        optimisee = pd.concat(colonnes, axis=1)
+        optimisee.columns = data.columns
+    else:
+        optimisee = data
+    apres = optimisee.memory_usage(index=False, deep=True)
+    rapport = pd.DataFrame({
+        "Type avant": types_avant.astype(str).to_numpy(),
+        "Type après": optimisee.dtypes.astype(str).to_numpy(),
+        "Mémoire avant (octets)": avant.to_numpy(),
+        "Mémoire après (octets)": apres.to_numpy(),
+    }, index=data.columns)
+    return optimisee, rapport
@@ -0,0 +1,124 @@
+import numpy as np
+import pandas as pd
+
+from aberrantes import TAILLE_ECHANTILLON_QUANTILES, detecter_aberrantes, retirer_lignes
+from colonnes import copie_modifiable, est_categorielle, est_numerique
+
+METHODES_IMPUTATION = (
+    "Supprimer",
+    "Remplir avec la médiane",
+    "Remplir avec la moyenne",
+    "Remplir avec le mode",
+    "Propager la valeur précédente",
+    "Propager la valeur suivante",
+)
+
+
+# Fonction pour effectuer le nettoyage des données (valeurs aberrantes) ; des positions déjà repérées
+# avec les mêmes paramètres évitent de refaire la détection
+def nettoyer_donnees_aberrantes(data, methode="IQR", groupe=None, approximatif=False, positions=None):
+    if positions is None:
+        positions = detecter_aberrantes(data, methode, groupe=groupe, approximatif=approximatif)
+    return retirer_lignes(data, positions)
+
+
+# Lignes sur lesquelles sont calculées les valeurs de remplacement : un échantillon en mode approché
+def _lignes_de_calcul(data, approximatif):
+    if approximatif and len(data) > TAILLE_ECHANTILLON_QUANTILES:
+        lignes = np.random.default_rng(0).choice(len(data), TAILLE_ECHANTILLON_QUANTILES, replace=False)
+        return data.iloc[np.sort(lignes)]
+    return data
+
+
+# Mode de chaque groupe (ou de la colonne entière si codes vaut None), en un seul comptage
+def _modes(serie, codes=None):
+    if codes is None:
+        modes = serie.mode()
+        return modes.iat[0] if len(modes) else np.nan
+    comptes = serie.groupby(codes, sort=False).value_counts(sort=True)
+    premiers = comptes[~comptes.index.get_level_values(0).duplicated()]
+    return pd.Series(premiers.index.get_level_values(1), index=premiers.index.get_level_values(0))
+
+
+# Fonction pour calculer les valeurs de remplacement : une par colonne, ou un tableau groupes x colonnes
+def valeurs_imputation(data, methode, colonnes, groupe=None, approximatif=False):
+    echantillon = _lignes_de_calcul(data, approximatif and methode != "Remplir avec la moyenne")
+    if methode == "Remplir avec le mode":
+        if groupe is None:
+            return pd.Series({colonne: _modes(echantillon[colonne]) for colonne in colonnes}, dtype=object)
+        return pd.DataFrame({colonne: _modes(echantillon[colonne], echantillon[groupe]) for colonne in colonnes})
+    agregat = "median" if methode == "Remplir avec la médiane" else "mean"
+    if groupe is None:
+        valeurs = echantillon[colonnes].agg(agregat)
+    else:
+        # Un seul groupby pour toutes les colonnes à remplir
+        valeurs = echantillon[colonnes].groupby(echantillon[groupe], sort=False).agg(agregat)
+    # Une colonne entière reste entière : ses valeurs de remplacement sont arrondies
+    entieres = [colonne for colonne in colonnes if pd.api.types.is_integer_dtype(data[colonne])]
+    if entieres:
+        valeurs = valeurs.astype(float)
+        valeurs[entieres] = valeurs[entieres].round()
+    return valeurs
+
+
+# Fonction pour effectuer le nettoyage des données (valeurs manquantes) ; rend la base et un rapport
+# (valeurs de remplacement, valeurs manquantes avant et après). Le masque des valeurs manquantes est
+# calculé une seule fois et resservi pour le rapport : seules les cases remplies sont revérifiées
+def nettoyer_donnees_manquantes(data, method, groupe=None, approximatif=False):
+    masque = data.isna()
+    avant = masque.sum()
+    rapport = {"valeurs": None, "manquants_avant": avant, "manquants_apres": avant}
+    if method == "Supprimer":
+        rapport["manquants_apres"] = avant * 0
+        return data[~masque.to_numpy().any(axis=1)], rapport
+
+    a_remplir = [colonne for colonne in data.columns[avant.to_numpy() > 0] if colonne != groupe]
+    if method in ("Remplir avec la médiane", "Remplir avec la moyenne"):
+        a_remplir = [colonne for colonne in a_remplir if est_numerique(data[colonne])]
+    elif method == "Remplir avec le mode":
+        a_remplir = [colonne for colonne in a_remplir if est_categorielle(data[colonne])]
+    elif method not in ("Propager la valeur précédente", "Propager la valeur suivante"):
+        raise ValueError("Méthode de traitement non prise en charge.")
+    if not a_remplir:
+        return data, rapport
+
+    # Les valeurs encore manquantes ne sont cherchées que parmi les cases qui l'étaient
+    apres = avant.copy()
+    remplies = {}
+    if method.startswith("Propager"):
+        blocs = data[a_remplir]
+        if groupe is not None:
+            blocs = blocs.groupby(data[groupe], sort=False, dropna=False)
+        propagees = blocs.ffill() if method == "Propager la valeur précédente" else blocs.bfill()
+        for colonne in a_remplir:
+            remplies[colonne] = propagees[colonne]
+            apres[colonne] = np.count_nonzero(propagees[colonne].isna().to_numpy() & masque[colonne].to_numpy())
+    else:
+        valeurs = valeurs_imputation(data, method, a_remplir, groupe, approximatif)
+        rapport["valeurs"] = valeurs
+        if groupe is None:
+            for colonne in a_remplir:
+                remplies[colonne] = data[colonne].fillna(valeurs[colonne])
+                apres[colonne] = avant[colonne] if pd.isna(valeurs[colonne]) else 0
+        else:
+            codes = valeurs.index.get_indexer(data[groupe])
+            globales = None
+            if (codes < 0).any() or valeurs.isna().to_numpy().any():
+                globales = valeurs_imputation(data, method, a_remplir, None, approximatif)
+            for colonne in a_remplir:
+                serie = data[colonne]
+                table = valeurs[colonne]
+                if globales is not None:
+                    # Groupe sans valeur, clé manquante ou groupe hors échantillon : valeur de toute la colonne,
+                    # ajoutée en dernière case
+                    table = pd.concat([table, pd.Series([globales[colonne]])]).fillna(globales[colonne])
+                # La table garde le type de la colonne (dates comprises) ; le code -1 désigne sa dernière case
+                table = pd.array(table, dtype=serie.dtype)
+                remplies[colonne] = serie.mask(masque[colonne].to_numpy(), table.take(codes))
+                apres[colonne] = np.count_nonzero(pd.isna(table)[codes] & masque[colonne].to_numpy())
+
+    resultat = copie_modifiable(data)
+    for colonne in a_remplir:
+        resultat[colonne] = remplies[colonne]
+    rapport["manquants_apres"] = apres
+    return resultat, rapport
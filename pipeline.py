@@ -0,0 +1,205 @@
+import hashlib
+import time
+
+import numpy as np
+import pandas as pd
+
+from cache_donnees import CacheDonnees
+from conversion import convertir_colonnes
+from instrumentation import Instrumentation
+from memoire import optimiser_memoire
+from nettoyage import nettoyer_donnees_aberrantes, nettoyer_donnees_manquantes
+from statistiques import hacher_colonnes
+from visionneuse import masque_condition
+
+# Budget mémoire par défaut des résultats intermédiaires du pipeline (en octets)
+BUDGET_PIPELINE_DEFAUT = 512 * 1024 * 1024
+
+
+# Fonction pour calculer l'empreinte d'une base de données déjà en mémoire
+def empreinte_donnees(data):
+    h = hashlib.blake2b(digest_size=16)
+    h.update(repr((list(data.columns), [str(t) for t in data.dtypes], len(data))).encode())
+    h.update(pd.util.hash_pandas_object(data.index).to_numpy().tobytes())
+    for hachages in hacher_colonnes(data):
+        h.update(hachages.tobytes())
+    return h.hexdigest()
+
+
+# Fonction pour calculer l'empreinte d'une étape à partir de celle de son entrée
+def empreinte_etape(cle_entree, nom, parametres):
+    h = hashlib.blake2b(digest_size=16)
+    h.update(cle_entree.encode())
+    h.update(nom.encode())
+    h.update(repr(sorted(parametres.items())).encode())
+    return h.hexdigest()
+
+
+# Étapes de transformation : des fonctions pures qui ne modifient pas leur entrée
+def supprimer_colonnes(data, colonnes):
+    if not colonnes:
+        return data
+    return data.drop(columns=list(colonnes))
+
+
+def supprimer_lignes(data, lignes):
+    if not lignes:
+        return data
+    return data.drop(index=list(lignes))
+
+
+def supprimer_plage_lignes(data, debut, fin):
+    if fin <= debut:
+        return data
+    garder = np.ones(len(data), dtype=bool)
+    garder[debut:fin] = False
+    return data[garder]
+
+
+def supprimer_lignes_condition(data, colonne, operateur, valeur=None):
+    if colonne is None:
+        return data
+    return data[~masque_condition(data, colonne, operateur, valeur)]
+
+
+def tronquer_lignes(data, option, nombre):
+    if nombre <= 0:
+        return data
+    if option == "Au début":
+        return data.iloc[nombre:]
+    elif option == "À la fin":
+        return data.iloc[:-nombre]
+    elif option == "Au milieu":
+        debut = len(data) // 2 - nombre // 2
+        return data.drop(index=data.index[debut:debut + nombre])
+    return data
+
+
+def renommer_colonnes(data, noms):
+    # noms : {ancien nom: nouveau nom}, pour les seules colonnes renommées
+    if not noms:
+        return data
+    absentes = [colonne for colonne in noms if colonne not in data.columns]
+    if absentes:
+        raise ValueError(f"Colonnes à renommer absentes de la base : {', '.join(map(str, absentes))}")
+    data = data.copy(deep=False)
+    data.columns = [noms.get(colonne, colonne) for colonne in data.columns]
+    return data
+
+
+# Conversion des types, avec le rapport des échecs
+def convertir_types(data, colonnes, types):
+    if not colonnes:
+        return data
+    return convertir_colonnes(data, list(colonnes), list(types))
+
+
+# Étapes connues, par nom : une spécification enregistrée y fait référence
+ETAPES = {
+    "optimiser_memoire": optimiser_memoire,
+    "supprimer_colonnes": supprimer_colonnes,
+    "supprimer_lignes": supprimer_lignes,
+    "supprimer_plage_lignes": supprimer_plage_lignes,
+    "supprimer_lignes_condition": supprimer_lignes_condition,
+    "tronquer_lignes": tronquer_lignes,
+    "convertir_types": convertir_types,
+    "nettoyer_donnees_aberrantes": nettoyer_donnees_aberrantes,
+    "nettoyer_donnees_manquantes": nettoyer_donnees_manquantes,
+    "renommer_colonnes": renommer_colonnes,
+}
+
+
+# Pipeline de transformations mémoïsé : chaque étape est identifiée par l'empreinte
+# de son entrée et de ses paramètres, et une réexécution repart de la première étape modifiée
+class PipelineTransformations:
+    def __init__(self, data, cache, cle_source=None, instrumentation=None):
+        self.cache = cache
+        self.instrumentation = instrumentation or Instrumentation(actif=False)
+        self._source = data
+        self._cle_source = cle_source or empreinte_donnees(data)
+        self._etapes = []
+        self._data = data
+        self.durees = []
+        self.details = None
+
+    @property
+    def cle(self):
+        return self._etapes[-1][3] if self._etapes else self._cle_source
+
+    @property
+    def donnees(self):
+        if self._data is None:
+            self._data = self._materialiser()
+        return self._data
+
+    def appliquer(self, nom, fonction, **parametres):
+        cle = empreinte_etape(self.cle, nom, parametres)
+        if cle in self.cache:
+            # Le résultat n'est relu que si une étape suivante ou l'affichage en a besoin
+            self._etapes.append((nom, fonction, parametres, cle))
+            self._data = None
+            self.details = self.cache.obtenir_details(cle)
+            self.durees.append((nom, 0.0, True))
+            return self
+        data = self.donnees
+        debut = time.perf_counter()
+        # La durée de l'étape comprend sa mise en cache
+        with self.instrumentation.mesurer(nom, data):
+            resultat, self.details = _executer(fonction, data, parametres)
+            # Une étape sans effet rend son entrée : inutile de la stocker une seconde fois
+            if resultat is not data:
+                self.cache.ajouter(cle, resultat, self.details)
+        self.durees.append((nom, time.perf_counter() - debut, False))
+        self._etapes.append((nom, fonction, parametres, cle))
+        self._data = resultat
+        return self
+
+    # Repart du dernier résultat encore en cache (ou de la source s'il a été évincé entre-temps)
+    def _materialiser(self):
+        depart, data = 0, self._source
+        for i in range(len(self._etapes) - 1, -1, -1):
+            resultat = self.cache.obtenir(self._etapes[i][3])
+            if resultat is not None:
+                depart, data = i + 1, resultat
+                break
+        for nom, fonction, parametres, cle in self._etapes[depart:]:
+            resultat, details = _executer(fonction, data, parametres)
+            if resultat is not data:
+                self.cache.ajouter(cle, resultat, details)
+            data = resultat
+        return data
+
+    # Liste des étapes appliquées, enregistrable en JSON et rejouable avec appliquer_specification
+    def specification(self):
+        return [{"etape": nom, **{cle: list(valeur) if isinstance(valeur, tuple) else valeur
+                                  for cle, valeur in parametres.items()}}
+                for nom, _, parametres, _ in self._etapes]
+
+    def tableau_durees(self):
+        return pd.DataFrame(self.durees, columns=["Étape", "Durée (s)", "Depuis le cache"])
+
+
+# Une étape peut rendre la base seule, ou un couple (base, détails) à afficher après l'étape
+def _executer(fonction, data, parametres):
+    resultat = fonction(data, **parametres)
+    if isinstance(resultat, tuple):
+        return resultat
+    return resultat, None
+
+
+# Fonction pour rejouer une spécification enregistrée ; rend la base et les détails de chaque étape
+def appliquer_specification(data, specification):
+    details = {}
+    for etape in specification:
+        parametres = {cle: tuple(valeur) if isinstance(valeur, list) else valeur
+                      for cle, valeur in etape.items() if cle != "etape"}
+        if etape["etape"] not in ETAPES:
+            raise ValueError(f"Étape inconnue : {etape['etape']}")
+        data, details[etape["etape"]] = _executer(ETAPES[etape["etape"]], data, parametres)
+    return data, details
+
+
+# Fonction pour créer le cache des résultats intermédiaires du pipeline ; les résultats partagent
+# les chaînes de la base source, qui ne sont donc pas recomptées pour chaque étape
+def creer_cache_pipeline(budget_octets=BUDGET_PIPELINE_DEFAUT):
+    return CacheDonnees(budget_octets=budget_octets, compter_objets=False)
@@ -0,0 +1,371 @@
+import hashlib
+
+import numpy as np
+import pandas as pd
+
+from colonnes import est_numerique
+
+# Nombre de lignes lues à chaque bloc en mode flux
+TAILLE_BLOC_DEFAUT = 100_000
+# Au-delà de ce nombre de lignes distinctes, les doublons sont estimés par HyperLogLog
+LIMITE_HACHAGES_EXACTS = 5_000_000
+
+QUANTILES_DESCRIPTION = (0.25, 0.5, 0.75)
+
+
+# Résultat structuré des statistiques d'une base de données
+class RapportStatistiques:
+    def __init__(self, valeurs_manquantes, moyenne, mediane, nb_lignes, nb_variables,
+                 doublons_lignes, doublons_colonnes, description, types, approximatif=False):
+        self.valeurs_manquantes = valeurs_manquantes
+        self.moyenne = moyenne
+        self.mediane = mediane
+        self.nb_lignes = nb_lignes
+        self.nb_variables = nb_variables
+        self.doublons_lignes = doublons_lignes
+        self.doublons_colonnes = doublons_colonnes
+        self.description = description
+        self.types = types
+        # Vrai si les quantiles ou les doublons sont des estimations
+        self.approximatif = approximatif
+
+
+# Sketch KLL : quantiles approchés, fusionnables, en mémoire bornée
+class SketchKLL:
+    def __init__(self, k=200, graine=None):
+        self.k = k
+        self.n = 0
+        self.niveaux = [np.empty(0)]
+        self._aleatoire = np.random.default_rng(graine)
+
+    def _capacite(self, niveau):
+        profondeur = len(self.niveaux) - niveau - 1
+        return max(2, int(np.ceil(self.k * (2 / 3) ** profondeur)))
+
+    def ajouter(self, valeurs):
+        valeurs = np.asarray(valeurs, dtype=float)
+        valeurs = valeurs[~np.isnan(valeurs)]
+        if len(valeurs) == 0:
+            return
+        self.n += len(valeurs)
+        self.niveaux[0] = np.concatenate([self.niveaux[0], valeurs])
+        self._compacter()
+
+    def fusionner(self, autre):
+        while len(self.niveaux) < len(autre.niveaux):
+            self.niveaux.append(np.empty(0))
+        for niveau, valeurs in enumerate(autre.niveaux):
+            self.niveaux[niveau] = np.concatenate([self.niveaux[niveau], valeurs])
+        self.n += autre.n
+        self._compacter()
+
+    # Chaque compaction garde un élément sur deux, qui monte d'un niveau avec un poids double
+    def _compacter(self):
+        niveau = 0
+        while niveau < len(self.niveaux):
+            valeurs = self.niveaux[niveau]
+            if len(valeurs) <= self._capacite(niveau):
+                niveau += 1
+                continue
+            if niveau + 1 == len(self.niveaux):
+                self.niveaux.append(np.empty(0))
+            valeurs = np.sort(valeurs)
+            reste = valeurs[-1:] if len(valeurs) % 2 else valeurs[:0]
+            paires = valeurs[:len(valeurs) - len(reste)]
+            promues = paires[self._aleatoire.integers(2)::2]
+            self.niveaux[niveau] = reste
+            self.niveaux[niveau + 1] = np.concatenate([self.niveaux[niveau + 1], promues])
+            niveau = 0
+
+    def quantiles(self, probabilites):
+        if self.n == 0:
+            return [np.nan for _ in probabilites]
+        valeurs = np.concatenate(self.niveaux)
+        poids = np.concatenate([np.full(len(v), 2.0 ** h) for h, v in enumerate(self.niveaux)])
+        ordre = np.argsort(valeurs, kind="stable")
+        valeurs = valeurs[ordre]
+        cumul = np.cumsum(poids[ordre])
+        cumul /= cumul[-1]
+        positions = np.searchsorted(cumul, probabilites, side="left")
+        return [float(valeurs[min(p, len(valeurs) - 1)]) for p in positions]
+
+
+# HyperLogLog : estimation du nombre d'éléments distincts à partir de hachages 64 bits
+class HyperLogLog:
+    def __init__(self, precision=14):
+        self.precision = precision
+        self.registres = np.zeros(1 << precision, dtype=np.uint8)
+
+    def ajouter_hachages(self, hachages):
+        hachages = np.asarray(hachages, dtype=np.uint64)
+        if len(hachages) == 0:
+            return
+        p = np.uint64(self.precision)
+        indices = (hachages >> (np.uint64(64) - p)).astype(np.int64)
+        restes = hachages << p
+        rangs = np.full(len(hachages), 64 - self.precision + 1, dtype=np.uint8)
+        non_nuls = restes != 0
+        # Le rang est la position du premier bit à 1 dans les bits restants
+        _, exposants = np.frexp(restes[non_nuls].astype(np.float64))
+        rangs[non_nuls] = np.minimum(65 - exposants, 64 - self.precision + 1).astype(np.uint8)
+        np.maximum.at(self.registres, indices, rangs)
+
+    def fusionner(self, autre):
+        np.maximum(self.registres, autre.registres, out=self.registres)
+
+    def estimation(self):
+        m = len(self.registres)
+        alpha = 0.7213 / (1 + 1.079 / m)
+        estimation = alpha * m * m / np.sum(2.0 ** -self.registres.astype(float))
+        nuls = int(np.count_nonzero(self.registres == 0))
+        if estimation <= 2.5 * m and nuls > 0:
+            estimation = m * np.log(m / nuls)
+        return int(round(estimation))
+
+
+# Fonction pour extraire les valeurs distinctes d'un tableau de hachages, triées : un tri suivi
+# d'une comparaison des voisins, bien plus rapide que np.unique (par tables de hachage depuis NumPy 2)
+def valeurs_distinctes(hachages):
+    triees = np.sort(hachages)
+    if len(triees) == 0:
+        return triees
+    return triees[np.concatenate(([True], triees[1:] != triees[:-1]))]
+
+
+# Compteur de lignes distinctes : exact tant que la mémoire le permet, puis HyperLogLog
+class CompteurDistincts:
+    def __init__(self, limite_exacte=LIMITE_HACHAGES_EXACTS):
+        self.limite_exacte = limite_exacte
+        self.hll = HyperLogLog()
+        self._uniques = np.empty(0, dtype=np.uint64)
+        self.exact = True
+
+    def ajouter_hachages(self, hachages):
+        hachages = np.asarray(hachages, dtype=np.uint64)
+        self.hll.ajouter_hachages(hachages)
+        if not self.exact:
+            return
+        nouveaux = valeurs_distinctes(hachages)
+        if len(self._uniques):
+            positions = np.searchsorted(self._uniques, nouveaux).clip(max=len(self._uniques) - 1)
+            nouveaux = nouveaux[self._uniques[positions] != nouveaux]
+        # Deux suites triées : le tri stable se réduit à une fusion linéaire
+        self._uniques = np.sort(np.concatenate([self._uniques, nouveaux]), kind="stable")
+        if len(self._uniques) > self.limite_exacte:
+            self.exact = False
+            self._uniques = np.empty(0, dtype=np.uint64)
+
+    def nombre(self):
+        if self.exact:
+            return len(self._uniques)
+        return self.hll.estimation()
+
+
+# Fonction pour hacher chaque colonne d'un bloc (un tableau de hachages 64 bits par colonne).
+# Les colonnes numériques sont hachées sous forme canonique (float64) : une valeur lue en entier
+# dans un bloc et en flottant dans un autre (bloc avec une valeur manquante) garde le même hachage
+def hacher_colonnes(bloc):
+    hachages = []
+    for i in range(bloc.shape[1]):
+        serie = bloc.iloc[:, i]
+        if est_numerique(serie):
+            serie = pd.Series(serie.to_numpy(dtype=float, na_value=np.nan))
+        # Sans catégorisation préalable : factoriser une colonne de chaînes très variées coûte plus que
+        # de hacher directement ses valeurs
+        hachages.append(pd.util.hash_pandas_object(serie, index=False, categorize=False).to_numpy(dtype=np.uint64))
+    return hachages
+
+
+# Fonction pour combiner les hachages des colonnes en un hachage par ligne
+def combiner_hachages(hachages_colonnes, nb_lignes):
+    resultat = np.full(nb_lignes, 0x345678, dtype=np.uint64)
+    multiplicateur = np.uint64(1000003)
+    for i, hachages in enumerate(hachages_colonnes):
+        resultat = (resultat ^ hachages) * multiplicateur
+        multiplicateur += np.uint64(82520 + 2 * (len(hachages_colonnes) - i))
+    return resultat
+
+
+# Fonction pour hacher chaque ligne d'un bloc
+def hacher_lignes(bloc):
+    return combiner_hachages(hacher_colonnes(bloc), len(bloc))
+
+
+# Fonction pour compter les colonnes dont le contenu est identique à une autre
+def compter_colonnes_dupliquees(hachages_colonnes):
+    empreintes = {hashlib.blake2b(h.tobytes(), digest_size=16).digest() for h in hachages_colonnes}
+    return len(hachages_colonnes) - len(empreintes)
+
+
+# Fonction pour calculer toutes les statistiques d'une base de données en une passe par colonne.
+# Comme data.mean() et data.median(), moyenne et médiane comprennent les colonnes booléennes ;
+# la description, comme data.describe(), ne garde que les colonnes numériques
+def calculer_statistiques(data):
+    nb_lignes, nb_variables = data.shape
+    numeriques = [pd.api.types.is_numeric_dtype(t) for t in data.dtypes]
+    colonnes_numeriques = data.columns[numeriques]
+
+    manquantes = pd.Series(
+        [int(data.iloc[:, i].isnull().sum()) if not numerique else 0 for i, numerique in enumerate(numeriques)],
+        index=data.columns, dtype="int64")
+
+    if len(colonnes_numeriques):
+        valeurs = data.loc[:, numeriques].to_numpy(dtype=float, na_value=np.nan)
+        # Un seul tri par colonne : les NaN sont rangés à la fin
+        triees = np.sort(valeurs, axis=0)
+        effectifs = nb_lignes - np.isnan(triees).sum(axis=0)
+        manquantes[numeriques] = nb_lignes - effectifs
+        with np.errstate(invalid="ignore", divide="ignore"):
+            moyennes = np.nansum(valeurs, axis=0) / effectifs
+            ecarts = np.sqrt(np.nansum((valeurs - moyennes) ** 2, axis=0) / (effectifs - 1))
+        # Moins de deux valeurs : écart-type indéfini (NaN, comme pandas), et non -0.0 ou l'infini
+        ecarts[effectifs < 2] = np.nan
+        del valeurs
+        lignes = {
+            "count": effectifs.astype(float),
+            "mean": moyennes,
+            "std": ecarts,
+            "min": _quantiles_tries(triees, effectifs, 0.0),
+        }
+        for q in QUANTILES_DESCRIPTION:
+            lignes[f"{q:.0%}"] = _quantiles_tries(triees, effectifs, q)
+        lignes["max"] = _quantiles_tries(triees, effectifs, 1.0)
+        tableau = pd.DataFrame(lignes, index=colonnes_numeriques).T
+        moyenne, mediane = tableau.loc["mean"], tableau.loc["50%"]
+        sans_booleens = [est_numerique(t) for t in data.dtypes[colonnes_numeriques]]
+        description = tableau.loc[:, sans_booleens] if any(sans_booleens) else data.describe()
+    else:
+        moyenne = mediane = pd.Series(dtype=float)
+        description = data.describe()
+
+    hachages = hacher_colonnes(data)
+    doublons_lignes = nb_lignes - len(valeurs_distinctes(combiner_hachages(hachages, nb_lignes)))
+
+    return RapportStatistiques(
+        valeurs_manquantes=manquantes,
+        moyenne=moyenne,
+        mediane=mediane,
+        nb_lignes=nb_lignes,
+        nb_variables=nb_variables,
+        doublons_lignes=doublons_lignes,
+        doublons_colonnes=compter_colonnes_dupliquees(hachages),
+        description=description,
+        types=data.dtypes,
+    )
+
+
+# Quantile par interpolation linéaire sur des colonnes déjà triées (comme pandas)
+def _quantiles_tries(triees, effectifs, q):
+    resultat = np.full(triees.shape[1], np.nan)
+    non_vides = effectifs > 0
+    if not non_vides.any():
+        return resultat
+    positions = q * (effectifs[non_vides] - 1)
+    bas = np.floor(positions).astype(np.int64)
+    haut = np.ceil(positions).astype(np.int64)
+    colonnes = triees[:, non_vides]
+    valeurs_bas = np.take_along_axis(colonnes, bas[None, :], axis=0)[0]
+    valeurs_haut = np.take_along_axis(colonnes, haut[None, :], axis=0)[0]
+    resultat[non_vides] = valeurs_bas + (valeurs_haut - valeurs_bas) * (positions - bas)
+    return resultat
+
+
+# Accumulateur des statistiques d'une base lue bloc par bloc
+class AccumulateurStatistiques:
+    def __init__(self, limite_exacte=LIMITE_HACHAGES_EXACTS):
+        self.colonnes = None
+        self.types = None
+        self.nb_lignes = 0
+        self.manquantes = None
+        self.numeriques = {}
+        self.exclues = set()
+        self.distincts = CompteurDistincts(limite_exacte)
+        self.empreintes_colonnes = {}
+
+    def ajouter_bloc(self, bloc):
+        if self.colonnes is None:
+            self.colonnes = list(bloc.columns)
+            self.types = bloc.dtypes.copy()
+            self.manquantes = pd.Series(0, index=bloc.columns, dtype="int64")
+            for colonne in bloc.columns:
+                self.empreintes_colonnes[colonne] = hashlib.blake2b(digest_size=16)
+        self.nb_lignes += len(bloc)
+        self.manquantes += bloc.isnull().sum()
+        hachages = hacher_colonnes(bloc)
+        self.distincts.ajouter_hachages(combiner_hachages(hachages, len(bloc)))
+
+        for colonne, hachages_colonne in zip(bloc.columns, hachages):
+            serie = bloc[colonne]
+            self.empreintes_colonnes[colonne].update(hachages_colonne.tobytes())
+            if colonne in self.exclues:
+                continue
+            if not pd.api.types.is_numeric_dtype(serie):
+                # Une colonne non numérique dans un seul bloc l'est pour toute la base
+                self.exclues.add(colonne)
+                self.numeriques.pop(colonne, None)
+                self.types[colonne] = serie.dtype
+                continue
+            if self.types[colonne] != serie.dtype and pd.api.types.is_float_dtype(serie):
+                self.types[colonne] = serie.dtype
+            self._ajouter_numerique(colonne, serie.to_numpy(dtype=float, na_value=np.nan))
+
+    # Moyenne et variance fusionnées par la méthode de Chan
+    def _ajouter_numerique(self, colonne, valeurs):
+        valeurs = valeurs[~np.isnan(valeurs)]
+        etat = self.numeriques.get(colonne)
+        if etat is None:
+            etat = {"n": 0, "moyenne": 0.0, "m2": 0.0, "min": np.inf, "max": -np.inf, "sketch": SketchKLL()}
+            self.numeriques[colonne] = etat
+        n_bloc = len(valeurs)
+        if n_bloc == 0:
+            return
+        moyenne_bloc = float(valeurs.mean())
+        m2_bloc = float(((valeurs - moyenne_bloc) ** 2).sum())
+        n_total = etat["n"] + n_bloc
+        delta = moyenne_bloc - etat["moyenne"]
+        etat["moyenne"] += delta * n_bloc / n_total
+        etat["m2"] += m2_bloc + delta * delta * etat["n"] * n_bloc / n_total
+        etat["n"] = n_total
+        etat["min"] = min(etat["min"], float(valeurs.min()))
+        etat["max"] = max(etat["max"], float(valeurs.max()))
+        etat["sketch"].ajouter(valeurs)
+
+    def rapport(self):
+        if self.colonnes is None:
+            raise pd.errors.EmptyDataError("Fichier vide!")
+        colonnes_numeriques = [c for c in self.colonnes if c in self.numeriques]
+        lignes = {}
+        for colonne in colonnes_numeriques:
+            etat = self.numeriques[colonne]
+            n = etat["n"]
+            ecart_type = np.sqrt(etat["m2"] / (n - 1)) if n > 1 else np.nan
+            quartiles = etat["sketch"].quantiles(QUANTILES_DESCRIPTION)
+            lignes[colonne] = [n, etat["moyenne"] if n else np.nan, ecart_type,
+                               etat["min"] if n else np.nan, *quartiles, etat["max"] if n else np.nan]
+        tableau = pd.DataFrame(lignes, index=["count", "mean", "std", "min", "25%", "50%", "75%", "max"],
+                               columns=colonnes_numeriques, dtype=float)
+        # Les colonnes booléennes comptent dans la moyenne et la médiane, pas dans la description
+        description = tableau.loc[:, [est_numerique(self.types[colonne]) for colonne in colonnes_numeriques]]
+        empreintes = {e.hexdigest() for e in self.empreintes_colonnes.values()}
+        return RapportStatistiques(
+            valeurs_manquantes=self.manquantes,
+            moyenne=tableau.loc["mean"],
+            mediane=tableau.loc["50%"],
+            nb_lignes=self.nb_lignes,
+            nb_variables=len(self.colonnes),
+            doublons_lignes=max(0, self.nb_lignes - self.distincts.nombre()),
+            doublons_colonnes=len(self.colonnes) - len(empreintes),
+            description=description,
+            types=self.types,
+            approximatif=True,
+        )
+
+
+# Fonction pour calculer les statistiques d'un fichier CSV/TXT sans le charger entièrement
+def statistiques_en_flux(source, delimiter=",", taille_bloc=TAILLE_BLOC_DEFAUT, **options):
+    accumulateur = AccumulateurStatistiques()
+    # Le délimiteur \s+ est reconnu par le moteur C, sans passer par le moteur Python
+    with pd.read_csv(source, chunksize=taille_bloc, delimiter=delimiter, engine="c", **options) as lecteur:
+        for bloc in lecteur:
+            accumulateur.ajouter_bloc(bloc)
+    return accumulateur.rapport()
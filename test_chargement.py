@@ -0,0 +1,122 @@
+import gzip
+import tempfile
+import threading
+import time
+import unittest
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import pandas as pd
+
+from chargement import NB_LIGNES_ECHANTILLON, ChargeurDistant, charger_contenu
+
+CONTENU_CSV = b"ville,montant\nParis,10\nLyon,20\nLome,30\n"
+ETAG = '"v1"'
+DELAI_LENT = 1.0
+
+
+# Serveur de test : /base.csv gère l'ETag (réponse 304), /compresse.csv est servi en gzip à la volée
+# et /lent.csv met du temps à répondre
+class Gestionnaire(BaseHTTPRequestHandler):
+    requetes = []
+
+    def do_GET(self):
+        Gestionnaire.requetes.append((self.path, self.headers.get("If-None-Match")))
+        if self.path == "/base.csv" and self.headers.get("If-None-Match") == ETAG:
+            self.send_response(304)
+            self.send_header("ETag", ETAG)
+            self.end_headers()
+            return
+        corps = CONTENU_CSV
+        self.send_response(200)
+        if self.path == "/compresse.csv":
+            corps = gzip.compress(CONTENU_CSV)
+            self.send_header("Content-Encoding", "gzip")
+        elif self.path == "/lent.csv":
+            time.sleep(DELAI_LENT)
+        self.send_header("ETag", ETAG)
+        self.send_header("Content-Length", str(len(corps)))
+        self.end_headers()
+        self.wfile.write(corps)
+
+    def log_message(self, *args):
+        pass
+
+
+class TestChargeurDistant(unittest.TestCase):
+    @classmethod
+    def setUpClass(cls):
+        cls.serveur = ThreadingHTTPServer(("127.0.0.1", 0), Gestionnaire)
+        cls.adresse = f"http://127.0.0.1:{cls.serveur.server_address[1]}"
+        threading.Thread(target=cls.serveur.serve_forever, daemon=True).start()
+
+    @classmethod
+    def tearDownClass(cls):
+        cls.serveur.shutdown()
+        cls.serveur.server_close()
+
+    def setUp(self):
+        Gestionnaire.requetes = []
+        self.repertoire = tempfile.TemporaryDirectory()
+        self.addCleanup(self.repertoire.cleanup)
+        # Durée de validité nulle : chaque appel interroge le serveur
+        self.chargeur = ChargeurDistant(self.repertoire.name, duree_validite=0)
+
+    def test_revalidation_etag(self):
+        url = self.adresse + "/base.csv"
+        chemin, meta = self.chargeur.telecharger(url)
+        chemin_bis, meta_bis = self.chargeur.telecharger(url)
+        self.assertEqual(Gestionnaire.requetes, [("/base.csv", None), ("/base.csv", ETAG)])
+        self.assertEqual(chemin_bis, chemin)
+        self.assertEqual(meta_bis["empreinte"], meta["empreinte"])
+        with open(chemin, "rb") as f:
+            self.assertEqual(f.read(), CONTENU_CSV)
+
+    def test_contenu_gzip_decompresse(self):
+        data, _ = self.chargeur.charger_csv(self.adresse + "/compresse.csv")
+        self.assertEqual(data["ville"].tolist(), ["Paris", "Lyon", "Lome"])
+        self.assertEqual(data["montant"].sum(), 60)
+
+    def test_telechargement_lent_ne_bloque_pas_les_autres(self):
+        lent = threading.Thread(target=self.chargeur.telecharger, args=(self.adresse + "/lent.csv",))
+        lent.start()
+        while not Gestionnaire.requetes:
+            time.sleep(0.01)
+        debut = time.perf_counter()
+        self.chargeur.telecharger(self.adresse + "/base.csv")
+        duree = time.perf_counter() - debut
+        lent.join()
+        self.assertLess(duree, DELAI_LENT / 2)
+
+
+class TestLectureTexte(unittest.TestCase):
+    def test_en_tete_avec_annees(self):
+        data, _ = charger_contenu("base.csv", b"pays;2019;2020;2021\nFrance;1;2;3\nTogo;4;5;6\n")
+        self.assertEqual(data.columns.tolist(), ["pays", "2019", "2020", "2021"])
+        self.assertEqual(data["pays"].tolist(), ["France", "Togo"])
+        self.assertEqual(data["2019"].tolist(), [1, 4])
+
+    def test_en_tete_numerique_garde_les_types(self):
+        data, _ = charger_contenu("base.csv", b"id,2019,2020\n1,2,3\n4,5,6\n")
+        self.assertEqual(data.columns.tolist(), ["id", "2019", "2020"])
+        self.assertTrue(all(pd.api.types.is_integer_dtype(t) for t in data.dtypes))
+
+    def test_sans_en_tete(self):
+        data, _ = charger_contenu("base.csv", b"1,2.5\n3,4\n5,6.5\n")
+        self.assertEqual(len(data), 3)
+        self.assertEqual(data.iloc[0].tolist(), [1, 2.5])
+
+    def test_txt_espaces_multiples_apres_l_echantillon(self):
+        lignes = [b"x y"] + [b"1 2"] * (NB_LIGNES_ECHANTILLON + 50) + [b"3  4", b"5\t 6"]
+        data, _ = charger_contenu("base.txt", b"\n".join(lignes) + b"\n")
+        self.assertEqual(data.columns.tolist(), ["x", "y"])
+        self.assertEqual(len(data), NB_LIGNES_ECHANTILLON + 52)
+        self.assertEqual(data.iloc[-2:].to_numpy().tolist(), [[3, 4], [5, 6]])
+
+    def test_txt_espaces_irreguliers(self):
+        data, _ = charger_contenu("base.txt", b"a   b c\n1 2    3\n  4 5 6\n")
+        self.assertEqual(data.columns.tolist(), ["a", "b", "c"])
+        self.assertEqual(data.to_numpy().tolist(), [[1, 2, 3], [4, 5, 6]])
+
+
+if __name__ == "__main__":
+    unittest.main()
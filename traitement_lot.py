@@ -0,0 +1,175 @@
+import argparse
+import fnmatch
+import json
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from concurrent.futures.process import EXTRA_QUEUED_CALLS, BrokenProcessPool
+
+import pandas as pd
+
+from cache_donnees import empreinte_contenu
+from chargement import detecter_format, lire_contenu
+from export import FORMATS_EXPORT, exporter
+from pipeline import appliquer_specification
+
+try:
+    import resource
+except ImportError:
+    resource = None
+
+EXTENSIONS_PRISES_EN_CHARGE = ("*.csv", "*.txt", "*.xlsx", "*.xls")
+FICHIER_ETAT = ".etat_lot.json"
+FICHIER_RAPPORT = "rapport_lot.csv"
+
+
+# Limite l'espace d'adressage de chaque processus de travail (Unix uniquement)
+def limiter_memoire(limite_mo):
+    if limite_mo and resource is not None:
+        limite = limite_mo * 1024 * 1024
+        resource.setrlimit(resource.RLIMIT_AS, (limite, limite))
+
+
+# Fonction pour nettoyer un fichier selon la spécification, exécutée dans un processus de travail
+def traiter_fichier(chemin, specification, dossier_sortie, format_export, empreinte_precedente=None):
+    debut = time.perf_counter()
+    resultat = {"fichier": os.path.basename(chemin), "statut": "traité", "lignes_avant": None,
+                "lignes_apres": None, "duree": None, "empreinte": None, "erreur": None}
+    try:
+        with open(chemin, "rb") as f:
+            contenu = f.read()
+        format_entree, options = detecter_format(chemin, contenu)
+        resultat["empreinte"] = empreinte_contenu(contenu, format_entree, sorted((options or {}).items()))
+        extension, _ = FORMATS_EXPORT[format_export]
+        sortie = os.path.join(dossier_sortie, f"{os.path.splitext(os.path.basename(chemin))[0]}.{extension}")
+        # Le contenu est comparé avant d'être lu : un fichier inchangé n'est pas analysé
+        if resultat["empreinte"] == empreinte_precedente and os.path.exists(sortie):
+            resultat["statut"] = "inchangé"
+            return resultat
+        data = lire_contenu(contenu, format_entree, options)
+        del contenu
+        resultat["lignes_avant"] = len(data)
+        data, _ = appliquer_specification(data, specification)
+        resultat["lignes_apres"] = len(data)
+        exporter(data, format_export, sortie)
+    except MemoryError:
+        resultat["statut"] = "mémoire dépassée"
+    except Exception as erreur:
+        resultat["statut"] = "erreur"
+        resultat["erreur"] = str(erreur)
+    finally:
+        resultat["duree"] = round(time.perf_counter() - debut, 3)
+    return resultat
+
+
+# Fonction pour lister les fichiers pris en charge d'un dossier
+def lister_fichiers(dossier, motifs=EXTENSIONS_PRISES_EN_CHARGE):
+    return sorted(os.path.join(dossier, nom) for nom in os.listdir(dossier)
+                  if any(fnmatch.fnmatch(nom.lower(), motif) for motif in motifs)
+                  and os.path.isfile(os.path.join(dossier, nom)))
+
+
+def _lire_etat(chemin_etat):
+    try:
+        with open(chemin_etat, encoding="utf-8") as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return {}
+
+
+# Traite des fichiers dans un pool de processus ; rend les résultats obtenus et, si le pool a été
+# interrompu, les fichiers non terminés dans l'ordre de soumission (qui est l'ordre de démarrage)
+def _executer_pool(chemins, nb_processus, limite_memoire_mo, specification, dossier_sortie, format_export,
+                   empreintes):
+    resultats = []
+    with ProcessPoolExecutor(max_workers=nb_processus, initializer=limiter_memoire,
+                             initargs=(limite_memoire_mo,)) as executeur:
+        taches = {executeur.submit(traiter_fichier, chemin, specification, dossier_sortie, format_export,
+                                   empreintes.get(os.path.basename(chemin))): chemin
+                  for chemin in chemins}
+        termines = set()
+        for tache in as_completed(taches):
+            try:
+                resultats.append(tache.result())
+            except BrokenProcessPool:
+                continue
+            termines.add(taches[tache])
+    return resultats, [chemin for chemin in chemins if chemin not in termines]
+
+
+# Fonction pour traiter tous les fichiers d'un dossier en parallèle ; rend le rapport de synthèse
+def traiter_dossier(dossier_entree, specification, dossier_sortie, format_export="CSV",
+                    nb_processus=None, limite_memoire_mo=None, forcer=False):
+    os.makedirs(dossier_sortie, exist_ok=True)
+    chemin_etat = os.path.join(dossier_sortie, FICHIER_ETAT)
+    etat = {} if forcer else _lire_etat(chemin_etat)
+    # Une autre spécification ou un autre format invalide les résultats précédents
+    signature = json.dumps([specification, format_export], sort_keys=True, default=str)
+    if etat.get("signature") != signature:
+        etat = {}
+    empreintes = etat.get("empreintes", {})
+    nb_processus = nb_processus or os.cpu_count() or 1
+
+    def executer(chemins, nb):
+        return _executer_pool(chemins, nb, limite_memoire_mo, specification, dossier_sortie, format_export,
+                              empreintes)
+
+    # Un processus de travail tué (mémoire épuisée, limite --memoire-max) interrompt tout le pool. Seuls les
+    # premiers fichiers non terminés ont pu être en cours : ils sont retraités un par un, pour ne signaler
+    # que le fautif, et les suivants sont relancés en parallèle dans un nouveau pool
+    resultats = []
+    restants = lister_fichiers(dossier_entree)
+    while restants:
+        resultats_pool, interrompus = executer(restants, nb_processus)
+        resultats.extend(resultats_pool)
+        suspects = interrompus[:nb_processus + EXTRA_QUEUED_CALLS]
+        restants = interrompus[nb_processus + EXTRA_QUEUED_CALLS:]
+        for chemin in suspects:
+            resultat_isole, interrompu = executer([chemin], 1)
+            resultats.extend(resultat_isole)
+            if interrompu:
+                statut = "mémoire dépassée" if limite_memoire_mo else "erreur"
+                resultats.append({"fichier": os.path.basename(chemin), "statut": statut,
+                                  "lignes_avant": None, "lignes_apres": None, "duree": None, "empreinte": None,
+                                  "erreur": "processus de travail interrompu"})
+
+    for resultat in resultats:
+        if resultat["statut"] in ("traité", "inchangé"):
+            empreintes[resultat["fichier"]] = resultat["empreinte"]
+        else:
+            empreintes.pop(resultat["fichier"], None)
+    with open(chemin_etat, "w", encoding="utf-8") as f:
+        json.dump({"signature": signature, "empreintes": empreintes}, f)
+
+    rapport = pd.DataFrame(resultats, columns=["fichier", "statut", "lignes_avant", "lignes_apres",
+                                               "duree", "empreinte", "erreur"])
+    rapport = rapport.sort_values("fichier").reset_index(drop=True)
+    rapport.to_csv(os.path.join(dossier_sortie, FICHIER_RAPPORT), index=False)
+    return rapport
+
+
+def main(arguments=None):
+    parseur = argparse.ArgumentParser(
+        description="Applique un pipeline enregistré depuis l'application à tous les fichiers d'un dossier.")
+    parseur.add_argument("specification", help="fichier JSON obtenu avec « Enregistrer le pipeline »")
+    parseur.add_argument("entree", help="dossier des fichiers à traiter")
+    parseur.add_argument("sortie", help="dossier des fichiers nettoyés et du rapport")
+    parseur.add_argument("--format", default="CSV", choices=list(FORMATS_EXPORT), help="format des fichiers produits")
+    parseur.add_argument("--processus", type=int, default=None,
+                         help="nombre de processus (par défaut, un par cœur)")
+    parseur.add_argument("--memoire-max", type=int, default=None, metavar="MO",
+                         help="mémoire maximale de chaque processus, en Mo")
+    parseur.add_argument("--forcer", action="store_true", help="retraiter aussi les fichiers inchangés")
+    arguments = parseur.parse_args(arguments)
+
+    with open(arguments.specification, encoding="utf-8") as f:
+        specification = json.load(f)
+    rapport = traiter_dossier(arguments.entree, specification, arguments.sortie, arguments.format,
+                              arguments.processus, arguments.memoire_max, arguments.forcer)
+    print(rapport.to_string(index=False))
+    print(rapport["statut"].value_counts().to_string())
+    return 0 if rapport["statut"].isin(["traité", "inchangé"]).all() else 1
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
@@ -0,0 +1,53 @@
+import numpy as np
+import pandas as pd
+
+TAILLES_PAGE = (25, 50, 100, 500)
+OPERATEURS = ("==", "!=", "<", "<=", ">", ">=", "contient", "est vide")
+
+
+# Fonction pour convertir la valeur saisie dans le type de la colonne comparée
+def convertir_valeur(serie, valeur):
+    if pd.api.types.is_bool_dtype(serie):
+        return str(valeur).strip().lower() in ("true", "vrai", "1", "oui")
+    if pd.api.types.is_numeric_dtype(serie):
+        return float(valeur)
+    if pd.api.types.is_datetime64_any_dtype(serie):
+        return pd.Timestamp(valeur)
+    return valeur
+
+
+# Fonction pour évaluer une condition simple (colonne, opérateur, valeur) ; rend un masque numpy
+def masque_condition(data, colonne, operateur, valeur=None):
+    serie = data[colonne]
+    if operateur == "est vide":
+        return serie.isna().to_numpy()
+    if operateur == "contient":
+        return serie.astype("string").str.contains(str(valeur), regex=False).fillna(False).to_numpy(dtype=bool)
+    valeur = convertir_valeur(serie, valeur)
+    comparaisons = {
+        "==": serie.__eq__, "!=": serie.__ne__, "<": serie.__lt__,
+        "<=": serie.__le__, ">": serie.__gt__, ">=": serie.__ge__,
+    }
+    if operateur not in comparaisons:
+        raise ValueError("Opérateur non pris en charge.")
+    return comparaisons[operateur](valeur).fillna(False).to_numpy(dtype=bool)
+
+
+# Fonction pour trier les positions des lignes selon une colonne (valeurs manquantes en dernier)
+def ordre_tri(data, colonne, croissant=True):
+    serie = data[colonne].reset_index(drop=True)
+    return serie.sort_values(ascending=croissant, kind="stable", na_position="last").index.to_numpy()
+
+
+# Fonction pour combiner tri et filtre en une liste de positions de lignes
+def positions_visibles(nb_lignes, ordre=None, masque=None):
+    positions = ordre if ordre is not None else np.arange(nb_lignes)
+    if masque is not None:
+        positions = positions[masque[positions]]
+    return positions
+
+
+# Fonction pour extraire une page de lignes : seules ces lignes sont envoyées au navigateur
+def extraire_page(data, positions, numero, taille):
+    debut = (numero - 1) * taille
+    return data.iloc[positions[debut:debut + taille]]